@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+
+Guards the start-up time of sirg.py: times `import sirg` and a table-only run on a small synthetic board in
+fresh interpreters, and fails when they are slower than the budgets or when a table-only run imports a
+charting or Excel module.
+
+usage: python benchmarks/bench_startup.py --import-budget 1.5 --run-budget 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SIRG_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from run_benchmarks import synthetic_board_path  # noqa: E402
+
+# Modules a table-only run must never import
+DEFERRED_MODULES = ["plotly", "kaleido", "openpyxl"]
+TABLE_ONLY_STAGES = "counts,internal"
+
+
+# ------------------------------------------------------------------------------
+def imported_modules(importtime_output):
+    """Names of the modules listed by python -X importtime."""
+    return {
+        line.rsplit("|", 1)[1].strip()
+        for line in importtime_output.splitlines()
+        if line.startswith("import time:") and line.count("|") == 2
+    }
+
+
+# ------------------------------------------------------------------------------
+def timed_run(command, repeat):
+    """Run a command in fresh interpreters and return the best wall time and the modules it imported."""
+    best = None
+    modules = set()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime"] + command,
+            cwd=SIRG_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        seconds = time.perf_counter() - start
+        if completed.returncode != 0:
+            sys.exit("{} failed:\n{}".format(" ".join(command), completed.stderr[-2000:]))
+        best = seconds if best is None else min(best, seconds)
+        modules = imported_modules(completed.stderr)
+    return best, modules
+
+
+# ------------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Check the start-up time of sirg.py.")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of every command, the best one counts")
+    parser.add_argument("--import-budget", type=float, default=1.5, help="seconds allowed for import sirg")
+    parser.add_argument("--run-budget", type=float, default=5.0, help="seconds allowed for a table-only run")
+    parser.add_argument("--cards", type=int, default=10000, help="number of cards of the synthetic board")
+    parser.add_argument("--output", help="json file the results are written to")
+    arguments = parser.parse_args()
+
+    results = {}
+    failures = []
+    import_seconds, import_modules = timed_run(["-c", "import sirg"], arguments.repeat)
+    with tempfile.TemporaryDirectory() as output_dir:
+        run_seconds, run_modules = timed_run(
+            [
+                "sirg.py",
+                "--input",
+                synthetic_board_path(arguments.cards),
+                "--output-dir",
+                output_dir,
+                "--start",
+                "2022-01-01 00:00",
+                "--end",
+                "2023-01-01 00:00",
+                "--only",
+                TABLE_ONLY_STAGES,
+                "--no-cache",
+            ],
+            arguments.repeat,
+        )
+    for name, seconds, budget, modules in [
+        ("import", import_seconds, arguments.import_budget, import_modules),
+        ("table_only_run", run_seconds, arguments.run_budget, run_modules),
+    ]:
+        deferred = sorted(
+            module for module in modules if module.split(".")[0] in DEFERRED_MODULES
+        )
+        results[name] = {"seconds": round(seconds, 3), "budget": budget, "deferred_modules_imported": deferred}
+        print("{:<16}{:>8.3f}s  (budget {}s)".format(name, seconds, budget))
+        if seconds > budget:
+            failures.append("{} took {:.3f}s, over its {}s budget".format(name, seconds, budget))
+        if deferred:
+            failures.append("{} imported {}".format(name, ", ".join(deferred)))
+
+    if arguments.output:
+        with open(arguments.output, "w") as f:
+            json.dump(results, f, indent=2)
+    for failure in failures:
+        print("FAILED: {}".format(failure))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
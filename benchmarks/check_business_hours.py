@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+
+Checks BusinessCalendar.business_hours of sirg.py against the reference it replaced, the number of ticks of
+pd.date_range with a CustomBusinessHour frequency, on a random corpus of timestamp pairs and holidays, and
+fails on the first pair where floor(hours) + 1 differs from it. Pairs whose hours are a whole number of
+working days are left out, pandas moves that last tick to the next opening.
+
+usage: python benchmarks/check_business_hours.py --pairs 600 --seed 0
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+import sirg  # noqa: E402
+
+CORPUS_START = "2022-01-01"
+CORPUS_DAYS = 365
+MAX_DURATION_DAYS = 30
+NO_HOLIDAYS = 20
+WORKING_TIME_SHARE = 0.8
+
+
+# ------------------------------------------------------------------------------
+def random_timestamps(rng, first_day, no_days, size):
+    """Random timestamps at second resolution, WORKING_TIME_SHARE of them within the business hours.
+
+    Timestamps outside of the business hours are rolled to an opening or a closing, so the hours between two
+    of them are a whole number of working days and are not checked.
+    """
+    opening = pd.Timedelta("{}:00".format(sirg.BUSINESS_HOURS_START)).total_seconds()
+    closing = pd.Timedelta("{}:00".format(sirg.BUSINESS_HOURS_END)).total_seconds()
+    seconds = np.where(
+        rng.random(size) < WORKING_TIME_SHARE,
+        rng.integers(opening, closing, size),
+        rng.integers(0, 86400, size),
+    )
+    return first_day + pd.to_timedelta(rng.integers(0, no_days, size) * 86400 + seconds, unit="s")
+
+
+# ------------------------------------------------------------------------------
+def generate_corpus(no_pairs, seed=0):
+    """Random (start, end) pairs ending up to MAX_DURATION_DAYS after they start, and NO_HOLIDAYS random
+    working days of the corpus as holidays.
+    :param seed: seed of the random generator, the same seed always gives the same corpus.
+    :return: (start Series, end Series, array of holidays) tuple.
+    """
+    rng = np.random.default_rng(seed)
+    corpus_start = pd.Timestamp(CORPUS_START)
+    starts = random_timestamps(rng, corpus_start, CORPUS_DAYS, no_pairs)
+    ends = random_timestamps(rng, starts.normalize(), MAX_DURATION_DAYS, no_pairs)
+    # Pairs ending before they start are 0 hours and have no ticks, they are swapped instead
+    starts, ends = np.minimum(starts, ends), np.maximum(starts, ends)
+    days = np.arange(
+        np.datetime64(CORPUS_START), np.datetime64(CORPUS_START) + CORPUS_DAYS + MAX_DURATION_DAYS
+    )
+    working_days = days[np.is_busday(days, weekmask=sirg.BUSINESS_WEEKMASK)]
+    holidays = np.sort(rng.choice(working_days, NO_HOLIDAYS, replace=False))
+    return pd.Series(starts), pd.Series(ends), holidays
+
+
+# ------------------------------------------------------------------------------
+def reference_ticks(start_timestamps, end_timestamps, holidays):
+    """Business hour ticks between every pair, with pandas offsets, one pair at a time."""
+    business_hour = pd.offsets.CustomBusinessHour(
+        start=sirg.BUSINESS_HOURS_START,
+        end=sirg.BUSINESS_HOURS_END,
+        weekmask=sirg.BUSINESS_WEEKMASK,
+        holidays=list(holidays),
+    )
+    return np.array(
+        [
+            len(pd.date_range(start=start, end=end, freq=business_hour))
+            for start, end in zip(start_timestamps, end_timestamps)
+        ]
+    )
+
+
+# ------------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=600, help="number of timestamp pairs of the corpus")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random generator")
+    arguments = parser.parse_args()
+
+    start_timestamps, end_timestamps, holidays = generate_corpus(arguments.pairs, arguments.seed)
+    calendar = sirg.BusinessCalendar(holidays=holidays)
+    hours = calendar.business_hours(start_timestamps, end_timestamps)
+    ticks = reference_ticks(start_timestamps, end_timestamps, holidays)
+
+    day_hours = (calendar.closing - calendar.opening) / np.timedelta64(1, "h")
+    working_days = hours / day_hours
+    checked = ~np.isclose(working_days, np.round(working_days))
+    mismatches = np.flatnonzero(checked & (np.floor(hours) + 1 != ticks))
+    print(
+        "{} pairs, {} checked, {} whole working days left out, {} mismatches".format(
+            len(hours), checked.sum(), (~checked).sum(), len(mismatches)
+        )
+    )
+    for pair in mismatches[:10]:
+        print(
+            "FAILED: {} to {}: {} business hours, {} ticks".format(
+                start_timestamps[pair], end_timestamps[pair], hours[pair], ticks[pair]
+            )
+        )
+    sys.exit(1 if len(mismatches) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+
+Compares two result files of run_benchmarks.py stage by stage, and fails when a stage of the candidate is
+slower than the baseline by more than the threshold ratio.
+
+usage: python benchmarks/compare_results.py benchmarks/results/OLD.json benchmarks/results/NEW.json
+"""
+import argparse
+import json
+import sys
+
+
+# ------------------------------------------------------------------------------
+def compare(baseline, candidate, measure="wall_seconds"):
+    """List (size, stage, baseline, candidate, ratio) for every stage measured in both results."""
+    rows = []
+    for size, size_results in candidate["sizes"].items():
+        if size not in baseline["sizes"]:
+            continue
+        for stage, measures in size_results["stages"].items():
+            baseline_measures = baseline["sizes"][size]["stages"].get(stage, {})
+            if measure not in measures or measure not in baseline_measures:
+                continue
+            before, after = baseline_measures[measure], measures[measure]
+            rows.append((size, stage, before, after, after / before if before else float("inf")))
+    return rows
+
+
+# ------------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", help="results of the reference commit")
+    parser.add_argument("candidate", help="results of the commit under test")
+    parser.add_argument(
+        "--measure",
+        default="wall_seconds",
+        choices=["wall_seconds", "cpu_seconds", "peak_traced_bytes"],
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=1.1, help="ratio above which a stage is flagged as slower"
+    )
+    arguments = parser.parse_args()
+    with open(arguments.baseline) as f:
+        baseline = json.load(f)
+    with open(arguments.candidate) as f:
+        candidate = json.load(f)
+
+    print("{} -> {} ({})".format(baseline["commit"], candidate["commit"], arguments.measure))
+    print("{:<10}{:<24}{:>14}{:>14}{:>10}".format("CARDS", "STAGE", "BASELINE", "CANDIDATE", "RATIO"))
+    failures = []
+    for size, stage, before, after, ratio in compare(baseline, candidate, arguments.measure):
+        slower = ratio > arguments.threshold
+        print(
+            "{:<10}{:<24}{:>14.3f}{:>14.3f}{:>10.2f}{}".format(
+                size, stage, before, after, ratio, "  SLOWER" if slower else ""
+            )
+        )
+        if slower:
+            failures.append(
+                "{} on {} cards: {} is {:.2f} times the baseline, over the {} threshold".format(
+                    stage, size, arguments.measure, ratio, arguments.threshold
+                )
+            )
+    for failure in failures:
+        print("FAILED: {}".format(failure))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
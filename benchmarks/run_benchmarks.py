@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+
+Times and memory-profiles every stage of sirg.py, from load_trello_board to gen_trends, on synthetic
+boards and writes the results as json so runs can be compared across commits with compare_results.py.
+
+usage: python benchmarks/run_benchmarks.py --sizes 10000 100000 1000000
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import pandas as pd
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+import sirg  # noqa: E402
+from synthetic_board import generate_board  # noqa: E402
+
+DATA_DIR = os.path.join(BENCHMARKS_DIR, "data")
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+SIZES = [10000, 100000, 1000000]
+
+
+# ------------------------------------------------------------------------------
+def synthetic_board_path(no_cards):
+    """Generate the synthetic board of a size once and reuse it on later runs."""
+    path = os.path.join(DATA_DIR, "board_{}.csv".format(no_cards))
+    if not os.path.exists(path):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        generate_board(no_cards).to_csv(path, index=False)
+    return path
+
+
+# ------------------------------------------------------------------------------
+def pipeline_stages(path, output_dir):
+    """List the stages of a report run as (name, function) pairs, every function takes the previous result."""
+
+    def load(_):
+        return sirg.load_trello_board(path, use_cache=False)
+
+    def window(trello_board):
+        return sirg.process_timestamps(
+            trello_board,
+            trello_board["TICKET_CREATION_TIMESTAMP"].min(),
+            trello_board["TICKET_CREATION_TIMESTAMP"].max() + pd.Timedelta(seconds=1),
+        )
+
+    def context(trello_board):
+        return trello_board, sirg.ReportContext(trello_board)
+
+    def generator(gen):
+        def stage(board_and_context):
+            gen(board_and_context[0], output_dir, board_and_context[1])
+            if gen in (sirg.gen_barplot, sirg.gen_trendline, sirg.gen_trends):
+                sirg.CHART_EXPORTER.flush()
+            return board_and_context
+
+        return stage
+
+    return [
+        ("load_trello_board", load),
+        ("filter_tickets", sirg.filter_tickets),
+        ("validate_tickets", lambda trello_board: sirg.validate_tickets(trello_board, output_dir)[0]),
+        ("offset_business_hours", sirg.offset_business_hours),
+        ("index_trello_board", sirg.index_trello_board),
+        ("process_timestamps", window),
+        ("report_context", context),
+        ("gen_internal_report", generator(sirg.gen_internal_report)),
+        ("gen_workbook", generator(sirg.gen_workbook)),
+        ("gen_field_counts", generator(sirg.gen_field_counts)),
+        ("gen_barplot", generator(sirg.gen_barplot)),
+        ("gen_trendline", generator(sirg.gen_trendline)),
+        ("gen_trends", generator(sirg.gen_trends)),
+    ]
+
+
+# ------------------------------------------------------------------------------
+def rows(result):
+    if isinstance(result, tuple):
+        result = result[0]
+    return len(result) if result is not None else None
+
+
+# ------------------------------------------------------------------------------
+def run_pipeline(path, profile_memory):
+    """Run every stage once, timing it or tracing its Python and numpy allocations.
+    :return: dict of stage name to measures.
+    """
+    output_dir = tempfile.mkdtemp(prefix="sirg_benchmark_")
+    measures = {}
+    result = None
+    try:
+        for name, stage in pipeline_stages(path, output_dir):
+            rows_in = rows(result)
+            if profile_memory:
+                tracemalloc.start()
+                result = stage(result)
+                measures[name] = {"peak_traced_bytes": tracemalloc.get_traced_memory()[1]}
+                tracemalloc.stop()
+            else:
+                wall_start, cpu_start = time.perf_counter(), time.process_time()
+                result = stage(result)
+                measures[name] = {
+                    "wall_seconds": round(time.perf_counter() - wall_start, 4),
+                    "cpu_seconds": round(time.process_time() - cpu_start, 4),
+                    "rows_in": rows_in,
+                    "rows_out": rows(result),
+                }
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return measures
+
+
+# ------------------------------------------------------------------------------
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARKS_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# ------------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every stage of sirg.py on synthetic boards.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="number of cards of the boards")
+    parser.add_argument(
+        "--chart-format",
+        choices=sirg.CHART_FORMATS,
+        default=sirg.CHART_FORMAT,
+        help="format of the exported charts, html leaves kaleido out of the measures",
+    )
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--output", help="json file the results are written to")
+    arguments = parser.parse_args()
+    sirg.CHART_EXPORTER.chart_format = arguments.chart_format
+
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "chart_format": arguments.chart_format,
+        "sizes": {},
+    }
+    for size in arguments.sizes:
+        path = synthetic_board_path(size)
+        measures = run_pipeline(path, profile_memory=False)
+        if not arguments.no_memory:
+            for name, memory in run_pipeline(path, profile_memory=True).items():
+                measures[name].update(memory)
+        results["sizes"][str(size)] = {
+            "csv_bytes": os.path.getsize(path),
+            "max_rss_kilobytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None,
+            "stages": measures,
+        }
+
+    print("---------------------")
+    print("{:<24}{:>10}{:>12}{:>12}{:>14}".format("STAGE", "CARDS", "WALL (s)", "CPU (s)", "PEAK (MiB)"))
+    for size, size_results in results["sizes"].items():
+        for name, measures in size_results["stages"].items():
+            print(
+                "{:<24}{:>10}{:>12.3f}{:>12.3f}{:>14}".format(
+                    name,
+                    size,
+                    measures["wall_seconds"],
+                    measures["cpu_seconds"],
+                    "{:.1f}".format(measures["peak_traced_bytes"] / 1024 ** 2)
+                    if "peak_traced_bytes" in measures
+                    else "-",
+                )
+            )
+
+    output = arguments.output or os.path.join(RESULTS_DIR, "{}.json".format(commit))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print("---------------------")
+    print("Results written to {}".format(output))
+
+
+if __name__ == "__main__":
+    main()
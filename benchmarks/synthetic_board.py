@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+
+Generates synthetic Trello board exports with the columns of the Trello csv power-up and the custom fields
+used by sirg.py, to benchmark the script on boards of any size. Boards ending with .json are written as
+Trello json exports.
+
+usage: python benchmarks/synthetic_board.py 100000 ./INPUT/synthetic.csv
+"""
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+LISTS = ["RESOLVED_AND_REVIEWED", "RESOLVED", "IN_PROGRESS", "NEW"]
+CATEGORIES = ["VSOC_INVESTIGATION", "MAINTENANCE", "CHANGE_REQUEST"]
+LOG_SOURCES = ["FIREWALL", "EDR", "PROXY", "ACTIVE_DIRECTORY", "EMAIL_GATEWAY", "WAF", "VPN", "DNS"]
+PRIORITIES = ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+RESOLUTION_CODES = ["FALSE_POSITIVE", "TRUE_POSITIVE", "BENIGN_TRUE_POSITIVE", "DUPLICATE"]
+LABELS = ["RC01 (False positive), PR02 (Medium)", "SC03 (Antivirus), RC02 (Malicious)", "TB01 (Misconfiguration)", ""]
+DESCRIPTIONS = [
+    "Alert triggered by {}.\nInvestigated the source host and user.\nNo malicious activity found, closed as benign.",
+    "Multiple failed logins from {}.\nAccount locked by the customer.\nEscalated to the customer for confirmation.",
+    "Suspicious outbound connection seen in {}.\nIOC checked against threat intel feeds.\nBlocked at the perimeter.",
+    "Policy violation reported by {}.\nUser notified, no further action required.",
+]
+
+
+# ------------------------------------------------------------------------------
+def generate_board(no_cards, seed=0, start="2022-01-01", days=365):
+    """Generate a synthetic Trello board export.
+    :param no_cards: number of cards on the board.
+    :param seed: seed of the random generator, the same seed always gives the same board.
+    :param start: date of the first card.
+    :param days: number of days the cards are spread over.
+    :return: Trello board export as a pandas dataframe.
+    """
+    rng = np.random.default_rng(seed)
+    created = pd.Timestamp(start) + pd.to_timedelta(
+        np.sort(rng.integers(0, days * 86400, no_cards)), unit="s"
+    )
+    resolved = created + pd.to_timedelta(rng.integers(10 * 60, 5 * 86400, no_cards), unit="s")
+    # Trello card IDs start with the creation time of the card in hex, a few minutes to hours after the alert
+    acknowledged = (created.asi8 // 10 ** 9) - 3 * 3600 + rng.integers(60, 8 * 3600, no_cards)
+    card_ids = pd.Series(acknowledged).map("{:08x}".format) + pd.Series(
+        rng.integers(0, 2 ** 63, no_cards, dtype=np.int64)
+    ).map("{:016x}".format)
+
+    log_sources = rng.choice(LOG_SOURCES, no_cards)
+    descriptions = pd.Series(rng.choice(DESCRIPTIONS, no_cards))
+    descriptions = pd.Series(
+        [description.format(log_source) for description, log_source in zip(descriptions, log_sources)]
+    )
+    return pd.DataFrame(
+        {
+            "Card ID": card_ids,
+            "Card Name": pd.Series(np.arange(1, no_cards + 1)).map("T{:07d}".format),
+            "Card URL": "https://trello.com/c/" + card_ids.str[-8:],
+            "Card Description": descriptions,
+            "Labels": rng.choice(LABELS, no_cards),
+            "Members": "analyst",
+            "Due Date": "",
+            "List ID": "5f1b2c3d4e5f6a7b8c9d0e1f",
+            "List Name": rng.choice(LISTS, no_cards, p=[0.8, 0.1, 0.07, 0.03]),
+            "Board ID": "5f1b2c3d4e5f6a7b8c9d0e00",
+            "Board Name": "sip-soc-shared",
+            "Archived": False,
+            "Last Activity Date": resolved.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "CREATION_DATE": created.strftime("%Y-%m-%d %H:%M:%S"),
+            "RESOLUTION_DATE": resolved.strftime("%Y-%m-%d %H:%M:%S"),
+            "CATEGORY": rng.choice(CATEGORIES, no_cards, p=[0.9, 0.07, 0.03]),
+            "LOG_SOURCE": log_sources,
+            "PRIORITY": rng.choice(PRIORITIES, no_cards, p=[0.4, 0.35, 0.2, 0.05]),
+            "OFFENSE_ID": rng.integers(10000, 999999, no_cards),
+            "RESOLUTION_CODE": rng.choice(RESOLUTION_CODES, no_cards, p=[0.6, 0.2, 0.15, 0.05]),
+        }
+    )
+
+
+# ------------------------------------------------------------------------------
+def write_trello_json(board, path, timezone="Asia/Riyadh"):
+    """Write a board as returned by generate_board as the json export of Trello.
+
+    The list custom fields have one option per value, dates are converted to UTC like Trello stores them and
+    every resolved card gets the action that moved it to its list.
+    :param board: Trello board export as a pandas dataframe.
+    :param path: json file the board is written to.
+    :param timezone: timezone of the dates of the board.
+    """
+    board = board.reset_index(drop=True)
+    object_ids = iter("{:024x}".format(object_id) for object_id in range(1, 10 ** 9))
+    lists = {name: next(object_ids) for name in LISTS}
+    custom_fields = []
+    items = {}
+    for column in ["CATEGORY", "LOG_SOURCE", "PRIORITY", "RESOLUTION_CODE"]:
+        options = {value: next(object_ids) for value in board[column].dropna().unique()}
+        custom_fields.append(
+            {
+                "id": next(object_ids),
+                "name": column,
+                "type": "list",
+                "options": [{"id": option, "value": {"text": value}} for value, option in options.items()],
+            }
+        )
+        items[column] = (custom_fields[-1]["id"], lambda value, options=options: {"idValue": options[value]})
+    for column, value_type in [("CREATION_DATE", "date"), ("RESOLUTION_DATE", "date"), ("OFFENSE_ID", "number")]:
+        custom_fields.append({"id": next(object_ids), "name": column, "type": value_type})
+        items[column] = (
+            custom_fields[-1]["id"],
+            lambda value, value_type=value_type: {"value": {value_type: str(value)}},
+        )
+    for column in ["CREATION_DATE", "RESOLUTION_DATE"]:
+        board[column] = (
+            pd.to_datetime(board[column])
+            .dt.tz_localize(timezone)
+            .dt.tz_convert("UTC")
+            .dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        )
+
+    cards = []
+    actions = []
+    for card in board.to_dict("records"):
+        labels = []
+        for label in filter(None, str(card["Labels"]).split(", ")):
+            name, _, color = label.partition(" (")
+            labels.append({"name": name, "color": color.rstrip(")")})
+        cards.append(
+            {
+                "id": card["Card ID"],
+                "name": card["Card Name"],
+                "desc": card["Card Description"],
+                "closed": bool(card["Archived"]),
+                "idList": lists[card["List Name"]],
+                "labels": labels,
+                "customFieldItems": [
+                    dict(idCustomField=field_id, **item(card[column]))
+                    for column, (field_id, item) in items.items()
+                    if not pd.isna(card[column])
+                ],
+            }
+        )
+        if card["List Name"].startswith("RESOLVED"):
+            actions.append(
+                {
+                    "id": next(object_ids),
+                    "type": "updateCard",
+                    "date": card["RESOLUTION_DATE"],
+                    "data": {
+                        "card": {"id": card["Card ID"], "name": card["Card Name"]},
+                        "listAfter": {"id": lists[card["List Name"]], "name": card["List Name"]},
+                    },
+                }
+            )
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "id": "5f1b2c3d4e5f6a7b8c9d0e00",
+                "name": "sip-soc-shared",
+                "actions": actions,
+                "cards": cards,
+                "lists": [{"id": list_id, "name": name, "closed": False} for name, list_id in lists.items()],
+                "customFields": custom_fields,
+            },
+            f,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic Trello board csv or json export.")
+    parser.add_argument("no_cards", type=int, help="number of cards on the board")
+    parser.add_argument("output", help="csv or json file the board is written to")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random generator")
+    arguments = parser.parse_args()
+    board = generate_board(arguments.no_cards, arguments.seed)
+    if arguments.output.endswith(".json"):
+        write_trello_json(board, arguments.output)
+    else:
+        board.to_csv(arguments.output, index=False)
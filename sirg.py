@@ -16,18 +16,47 @@ This tool accepts comma separated value files (.csv) as well as excel
 # =======================================================================================================
 # Imports
 # =======================================================================================================
-# import numpy as np
+import numpy as np
 import pandas as pd
 import datetime as datetime
-import plotly.graph_objects as go
 
+# plotly, openpyxl and pyarrow are imported by the stages that use them so runs that skip those stages
+# never pay for them, see _import_pyarrow
 # import plotly.express as px
+import argparse
+import asyncio
+import contextlib
+import cProfile
+import functools
+import glob
+import hashlib
+import html
+import json
+import mimetypes
 import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import tracemalloc
+import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
 
 # import plotly.io as plt
-from pretty_html_table import build_table
 from termcolor import colored
 
+pa = pa_compute = pa_csv = pa_feather = None
+
+try:
+    import resource
+except ImportError:  # Windows, the peak RSS of the stages is not recorded
+    resource = None
+
 # TODO: fix it!
 pd.options.mode.chained_assignment = None  # default='warn'
 
@@ -35,7 +64,297 @@ pd.options.mode.chained_assignment = None  # default='warn'
 # Global variables
 # =======================================================================================================
 COLORS = ["#E7C65B", "#225560", "#310D20", "#96031A"]
-DEBUG = False
+CHART_FORMAT = "svg"
+CHART_FORMATS = ["svg", "png", "pdf", "html"]
+INPUT_DIR = "./INPUT/"
+TRELLO_BOARD_PATH = "./INPUT/j8wC07hR - sip-soc-shared.csv"
+OUTPUT_DIR = "./OUTPUT/"
+# Trello export columns used by the pipeline and their report names, nothing else is read from the csv file
+TRELLO_COLUMNS = {
+    "Card Name": "T#",
+    "Card Description": "DESC",
+    "List Name": "STATUS",
+    "CREATION_DATE": "TICKET_CREATION_TIMESTAMP",
+    "Card ID": "TICKET_RESPONSE_TIMESTAMP",
+    "RESOLUTION_DATE": "TICKET_RESOLUTION_TIMESTAMP",
+    "CATEGORY": "CATEGORY",
+    "LOG_SOURCE": "LOG_SOURCE",
+    "PRIORITY": "PRIORITY",
+    "OFFENSE_ID": "OFFENSE_ID",
+    "RESOLUTION_CODE": "RESOLUTION_CODE",
+    "Labels": "LABELS",
+}
+CATEGORICAL_COLUMNS = ["STATUS", "CATEGORY", "LOG_SOURCE", "PRIORITY", "RESOLUTION_CODE"]
+# DESC is dictionary-encoded while there are at most that many distinct descriptions per ticket
+DESC_CATEGORY_RATIO = 0.5
+TIMESTAMP_COLUMNS = ["TICKET_CREATION_TIMESTAMP", "TICKET_RESOLUTION_TIMESTAMP"]
+# Tickets failing a check are left out of the reports and listed in QUARANTINE_NAME
+VALIDATION_CHECKS = ["DUPLICATE_TICKET", "MISSING_FIELD", "RESOLVED_BEFORE_CREATION", "OUT_OF_RANGE"]
+REQUIRED_COLUMNS = [
+    "T#",
+    "TICKET_CREATION_TIMESTAMP",
+    "TICKET_RESOLUTION_TIMESTAMP",
+    "LOG_SOURCE",
+    "RESOLUTION_CODE",
+]
+# Earliest valid creation or resolution date of a ticket (yyyy-mm-dd), only future timestamps are out of
+# range when it is None. Card IDs are not a bound, tickets imported into the board are older than their card.
+EARLIEST_DATE = None
+# Slack after the time of the run for the timestamps of a ticket
+TIMESTAMP_MARGIN = pd.Timedelta(days=30)
+QUARANTINE_NAME = "QUARANTINE.csv"
+QUARANTINE_COLUMNS = ["T#", "OFFENSE_ID", "TICKET_CREATION_TIMESTAMP", "TICKET_RESOLUTION_TIMESTAMP"]
+# Labels of the older boards are read only when they are decoded, their codes start with these prefixes
+LABEL_COLUMNS = {
+    "SC": "SEC_CONTROL",
+    "RC": "RESOLUTION_CODE",
+    "CO": "DEPENDENT_ON",
+    "TB": "ROOT_CAUSE",
+    "PR": "PRIORITY",
+}
+# Label colors and names between parentheses are matched and dropped instead of being stripped beforehand
+LABEL_PATTERN = r"\([^)]*\)|\b(?P<code>(?P<prefix>{})\d{{2}})\b".format("|".join(LABEL_COLUMNS))
+LABELS_TRANSLATION_PATH = "./INPUT/labels_translation.csv"
+RESOLVED_STATUS = "RESOLVED_AND_REVIEWED"
+INVESTIGATION_CATEGORY = "VSOC_INVESTIGATION"
+CHUNK_SIZE = 100000
+# Characters of a Trello json export read at a time, its cards are decoded one by one out of that buffer
+JSON_BLOCK_SIZE = 1024 * 1024
+JSON_SEPARATORS = re.compile(r"[\s,:]*")
+TIMEZONE = "Asia/Riyadh"
+BUSINESS_HOURS_START = "08:15"
+BUSINESS_HOURS_END = "15:30"
+BUSINESS_WEEKMASK = "Sun Mon Tue Wed Thu"
+SLA_COLUMNS = {
+    "BUSINESS_HOURS_TO_ACKNOWLEDGE": "ACKNOWLEDGE",
+    "BUSINESS_HOURS_TO_RESOLVE": "RESOLVE",
+}
+# Value of every ascii hex digit, 255 for the other bytes
+HEX_DIGITS = np.full(256, 255, dtype=np.uint8)
+HEX_DIGITS[np.frombuffer(b"0123456789", dtype=np.uint8)] = np.arange(10)
+HEX_DIGITS[np.frombuffer(b"abcdef", dtype=np.uint8)] = np.arange(10, 16)
+HEX_DIGITS[np.frombuffer(b"ABCDEF", dtype=np.uint8)] = np.arange(10, 16)
+COUNTED_FIELDS = ["LOG_SOURCE", "RESOLUTION_CODE"]
+# Fields of the daily cube counted once per board, and of the daily pivot the trends are computed from
+CUBE_FIELDS = ["LOG_SOURCE", "RESOLUTION_CODE", "PRIORITY"]
+TREND_FIELDS = ["LOG_SOURCE", "RESOLUTION_CODE"]
+TREND_ROLLUPS = {"WEEKLY": "W", "MONTHLY": "M"}
+TREND_ROLLING_DAYS = 7
+TREND_PERCENTILE_DAYS = 28
+# A day is flagged when its count is that many standard deviations away from the TREND_PERCENTILE_DAYS before it
+ANOMALY_ZSCORE = 3.0
+# The stacked trends of longer windows are plotted per week
+TREND_DAILY_MAX_DAYS = 92
+CUSTOMER_REPORT_COLUMNS = [
+    "T#",
+    "TICKET_CREATION_TIMESTAMP",
+    "OFFENSE_ID",
+    "LOG_SOURCE",
+    "RESOLUTION_CODE",
+    "DESC",
+    "PRIORITY",
+    "TICKET_RESPONSE_TIMESTAMP",
+    "BUSINESS_HOURS_TO_ACKNOWLEDGE",
+    "BUSINESS_HOURS_TO_RESOLVE",
+]
+EXCEL_CHUNK_SIZE = 10000
+HTML_CHUNK_SIZE = 1000
+# Rows of every page of the html report, 0 writes a single page
+HTML_ROWS_PER_PAGE = 5000
+# Same look as the grey_light theme of pretty_html_table, as a stylesheet instead of a style attribute per cell
+HTML_STYLE = """
+table.dataframe {border: 0; border-collapse: collapse;}
+table.dataframe th, table.dataframe td {font-family: Century Gothic, sans-serif; font-size: medium;
+    text-align: left; padding: 0px 20px 0px 0px; width: auto;}
+table.dataframe thead th {background-color: #FFFFFF; color: #808080; border-bottom: 2px solid #808080;}
+table.dataframe tbody tr:nth-child(odd) {background-color: #EDEDED;}
+table.dataframe tbody tr:nth-child(even) {background-color: white; color: black;}
+nav {font-family: Century Gothic, sans-serif; margin: 10px 0px;}
+"""
+CACHE_DIR = "./CACHE/"
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+TICKET_STORE_NAME = "tickets_{}.sqlite"
+RUN_LOG_NAME = "run_log.json"
+OUTPUT_MANIFEST_NAME = "output_manifest.json"
+PROFILERS = ["cprofile", "tracemalloc"]
+# Stage profiled on every run, e.g. "workbook", and the profiler used
+PROFILE_STAGE = None
+PROFILER = "cprofile"
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8080
+SERVICE_CACHE_ENTRIES = 128
+WATCH_INTERVAL = 5
+# Report types of the report service, the stage that renders them and their file name without the window prefix
+SERVICE_REPORTS = {
+    "internal": ("internal", "SOC_REPORT.html"),
+    "workbook": ("workbook", "REPORT.xlsx"),
+    "log_source": ("counts", "LOG_SOURCE.csv"),
+    "resolution_code": ("counts", "RESOLUTION_CODE.csv"),
+    "log_source_chart": ("barplot", "LOG_SOURCE_COUNT.{chart_format}"),
+    "resolution_code_chart": ("barplot", "RESOLUTION_CODE_COUNT.{chart_format}"),
+    "trendline": ("trendline", "TRENDLINE.{chart_format}"),
+    "trends": ("trends", "TRENDS.{chart_format}"),
+    "trends_daily": ("trends", "TRENDS_DAILY.csv"),
+    "trends_weekly": ("trends", "TRENDS_WEEKLY.csv"),
+    "trends_monthly": ("trends", "TRENDS_MONTHLY.csv"),
+    "log_source_trend": ("trends", "LOG_SOURCE_TREND.{chart_format}"),
+    "resolution_code_trend": ("trends", "RESOLUTION_CODE_TREND.{chart_format}"),
+}
+
+
+# ------------------------------------------------------------------------------
+def print_status(message, status="[SUCCESS]", color="green"):
+    """Print a status line in a single write so lines of concurrent stages do not interleave."""
+    print(colored(status, color) + "....................." + message)
+
+
+# ------------------------------------------------------------------------------
+def _peak_rss_mib():
+    """Peak resident set size of the process so far in MiB, None where the resource module is missing."""
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak_rss / (1024 ** 2 if sys.platform == "darwin" else 1024), 1)
+
+
+# ------------------------------------------------------------------------------
+@contextlib.contextmanager
+def measure_stage(name, rows_in=None, window=None, output_dir=OUTPUT_DIR):
+    """Measure the stage run in the with block and yield its record.
+
+    The record holds the wall time, the CPU time of the thread running the stage, the rows it received and
+    the rows_out the block sets, the peak RSS of the process once the stage is done and the traceback of
+    the stage when it raised. The PROFILE_STAGE is also profiled into output_dir, with cProfile or with
+    tracemalloc, which traces the allocations of every thread.
+    :param name: name of the stage, one of MEASURED_STAGES.
+    :param rows_in: number of tickets the stage received.
+    :param window: file prefix of the report window of the report stages.
+    :param output_dir: directory the profile is written to.
+    """
+    if name not in MEASURED_STAGES:
+        # The stages --profile-stage accepts are listed from MEASURED_STAGES
+        raise ValueError("{} is not one of the MEASURED_STAGES".format(name))
+    record = {
+        "stage": name,
+        "board": None,
+        "window": window,
+        "wall_seconds": None,
+        "cpu_seconds": None,
+        "rows_in": rows_in,
+        "rows_out": None,
+        "peak_rss_mib": None,
+        "error": None,
+    }
+    # Report stages running in threads only account for their own thread
+    if threading.current_thread() is threading.main_thread():
+        cpu_clock = time.process_time
+    else:
+        cpu_clock = time.thread_time
+    profiler = None
+    if name == PROFILE_STAGE:
+        if PROFILER == "tracemalloc":
+            tracemalloc.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+    wall_start, cpu_start = time.perf_counter(), cpu_clock()
+    try:
+        yield record
+    except BaseException:
+        record["error"] = traceback.format_exc()
+        raise
+    finally:
+        record["wall_seconds"] = round(time.perf_counter() - wall_start, 4)
+        record["cpu_seconds"] = round(cpu_clock() - cpu_start, 4)
+        record["peak_rss_mib"] = _peak_rss_mib()
+        if name == PROFILE_STAGE:
+            profile_path = os.path.join(output_dir, "{}{}".format(window or "", name.upper()))
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(profile_path + ".prof")
+                profile_path += ".prof"
+            else:
+                top_allocations = tracemalloc.take_snapshot().statistics("lineno")[:25]
+                tracemalloc.stop()
+                profile_path += ".tracemalloc.txt"
+                with open(profile_path, "w") as f:
+                    f.write("\n".join(str(allocation) for allocation in top_allocations))
+            print_status("Profiled the {} stage into {}.".format(name, profile_path))
+
+
+# ------------------------------------------------------------------------------
+class RunLog:
+    """Records of every stage of a run, written as a json run log and printed as a summary table."""
+
+    def __init__(self):
+        self.records = []
+        self.started = datetime.datetime.now()
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name, rows_in=None, window=None, output_dir=OUTPUT_DIR, board=None):
+        """Measure a stage with measure_stage and keep its record, even when it raised.
+        :param board: name of the board of a multi-board run, e.g. the customer.
+        """
+        with measure_stage(name, rows_in, window, output_dir) as record:
+            record["board"] = board
+            self.records.append(record)
+            yield record
+
+    def write(self, path, arguments=None):
+        """Write the records to path as json, with the command line arguments of the run."""
+        with atomic_path(path) as temporary_path, open(temporary_path, "w") as f:
+            json.dump(
+                {
+                    "started": self.started.isoformat(timespec="seconds"),
+                    "wall_seconds": round(time.perf_counter() - self._start, 4),
+                    "peak_rss_mib": _peak_rss_mib(),
+                    "arguments": arguments,
+                    "stages": self.records,
+                },
+                f,
+                indent=2,
+                default=str,
+            )
+
+    def print_summary(self):
+        # The board column is only shown for multi-board runs
+        board_width = max([len(record["board"]) + 2 for record in self.records if record["board"]] or [0])
+        print("---------------------")
+        print(
+            "{:<{}}{:<16}{:<18}{:>10}{:>10}{:>10}{:>10}{:>12}  {}".format(
+                "BOARD" if board_width else "",
+                board_width,
+                "STAGE",
+                "WINDOW",
+                "WALL (s)",
+                "CPU (s)",
+                "ROWS IN",
+                "ROWS OUT",
+                "RSS (MiB)",
+                "STATUS",
+            )
+        )
+        for record in self.records:
+            print(
+                "{:<{}}{:<16}{:<18}{:>10.2f}{:>10.2f}{:>10}{:>10}{:>12}  {}".format(
+                    record["board"] or "",
+                    board_width,
+                    record["stage"],
+                    record["window"] or "",
+                    record["wall_seconds"],
+                    record["cpu_seconds"],
+                    "" if record["rows_in"] is None else record["rows_in"],
+                    "" if record["rows_out"] is None else record["rows_out"],
+                    "" if record["peak_rss_mib"] is None else record["peak_rss_mib"],
+                    "FAILED" if record["error"] else "SKIPPED" if record.get("skipped") else "OK",
+                )
+            )
+        print("---------------------")
+
+
+RUN_LOG = RunLog()
 
 
 # ------------------------------------------------------------------------------
@@ -69,67 +388,780 @@ def about_script():
 
 # ------------------------------------------------------------------------------
 # TODO: Change this to PATH
-def prepare_output():
-    if not os.path.exists("OUTPUT/"):
-        os.makedirs("OUTPUT/")
+def prepare_output(output_dir=OUTPUT_DIR, force=False):
+    """Create the output directory and return the OutputManager of its manifest.
+    :param force: regenerate every report, even the unchanged ones.
+    """
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    return OutputManager(output_dir, force)
+
+
+# ------------------------------------------------------------------------------
+_STAGE_ARTIFACTS = threading.local()
+
+
+# ------------------------------------------------------------------------------
+@contextlib.contextmanager
+def collect_artifacts():
+    """Collect the paths of the files written by the thread in the with block into the yielded list."""
+    _STAGE_ARTIFACTS.paths = []
+    try:
+        yield _STAGE_ARTIFACTS.paths
+    finally:
+        _STAGE_ARTIFACTS.paths = None
+
+
+# ------------------------------------------------------------------------------
+def record_artifact(path):
+    """Add a file to the artifacts collected in this thread, if any."""
+    artifacts = getattr(_STAGE_ARTIFACTS, "paths", None)
+    if artifacts is not None:
+        artifacts.append(path)
+
+
+# ------------------------------------------------------------------------------
+@contextlib.contextmanager
+def atomic_path(path):
+    """Temporary path to write a file to, renamed over path once the with block completed.
+
+    Readers of the output directory never see a partial file, and a failed write leaves the previous file.
+    """
+    temporary_path = "{}.{}-{}.tmp".format(path, os.getpid(), threading.get_ident())
+    try:
+        yield temporary_path
+        os.replace(temporary_path, path)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temporary_path)
+    record_artifact(path)
+
+
+# ------------------------------------------------------------------------------
+def write_csv(frame, path, **options):
+    """Write a dataframe as a csv file through atomic_path."""
+    with atomic_path(path) as temporary_path:
+        frame.to_csv(temporary_path, **options)
+
+
+# ------------------------------------------------------------------------------
+def _file_digest(path):
+    """sha256 of a file, None when it does not exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+# ------------------------------------------------------------------------------
+@functools.lru_cache(maxsize=1)
+def _script_digest():
+    """sha256 of this script, a new version of the generators regenerates every report."""
+    return _file_digest(os.path.abspath(__file__))
+
+
+# ------------------------------------------------------------------------------
+def board_digest(trello_board):
+    """Hash the rows, the index and the columns of a Trello board into a hex digest."""
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(trello_board, index=True).to_numpy().tobytes())
+    digest.update(
+        json.dumps([[str(column), str(dtype)] for column, dtype in trello_board.dtypes.items()]).encode()
+    )
+    return digest.hexdigest()
+
+
+# ------------------------------------------------------------------------------
+class OutputManager:
+    """Manifest of the reports of an output directory, to skip the report stages whose input did not change.
+
+    Every report stage of a window has an entry with the fingerprint of its input, the tickets of the window
+    and the options the stage depends on, and the sha256 of every file it wrote. A stage is unchanged when
+    its fingerprint is the same and its files are still there as they were written. The manifest is only
+    updated by the process owning the output directory, worker processes get a copy to check the stages.
+    """
+
+    def __init__(self, output_dir=OUTPUT_DIR, force=False):
+        self.output_dir = output_dir
+        self.force = force
+        self.path = os.path.join(output_dir, OUTPUT_MANIFEST_NAME)
+        self.entries = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def fingerprint(window_digest, stage):
+        """Fingerprint of the input of a report stage, see board_digest for window_digest."""
+        inputs = [window_digest, stage, _script_digest()]
+        if stage == "internal":
+            inputs.append(HTML_ROWS_PER_PAGE)
+        if stage in CHART_STAGES:
+            inputs.append(CHART_EXPORTER.chart_format)
+        return hashlib.sha256(json.dumps(inputs).encode()).hexdigest()
+
+    def is_unchanged(self, window, stage, fingerprint):
+        """Whether the files of a report stage were written from the same input and were not modified since."""
+        entry = self.entries.get(window + stage)
+        return (
+            not self.force
+            and entry is not None
+            and entry["fingerprint"] == fingerprint
+            and all(
+                _file_digest(os.path.join(self.output_dir, file_name)) == digest
+                for file_name, digest in entry["artifacts"].items()
+            )
+        )
+
+    def update(self, records):
+        """Keep the artifacts of the report stages that ran in the manifest and write it.
+
+        The entries of the stages that failed, or whose charts failed to export, are dropped so they run again.
+        :param records: measure_stage records as returned by gen_reports.
+        """
+        failed_charts = {
+            record["window"] for record in records if record["stage"] == "charts" and record["error"]
+        }
+        for record in records:
+            if record.get("fingerprint") is None or record.get("skipped"):
+                continue
+            key = record["window"] + record["stage"]
+            artifacts = {
+                os.path.basename(path): _file_digest(path) for path in record.get("artifacts") or []
+            }
+            if (
+                record["error"]
+                or None in artifacts.values()
+                or (record["stage"] in CHART_STAGES and record["window"] in failed_charts)
+            ):
+                self.entries.pop(key, None)
+            else:
+                self.entries[key] = {"fingerprint": record["fingerprint"], "artifacts": artifacts}
+        with atomic_path(self.path) as temporary_path, open(temporary_path, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
 
 # ------------------------------------------------------------------------------
-def initialisation():
-    """Guides the user to use the correct naming for both files."""
+def initialisation(trello_board_path=TRELLO_BOARD_PATH, output_dir=OUTPUT_DIR, force=False):
+    """Guides the user to put the export where the script reads it and prepares the output directory.
+    :param trello_board_path: path of the exported Trello board given with --input.
+    :param output_dir: directory the reports are written to, given with --output-dir.
+    :param force: regenerate every report, even the unchanged ones.
+    :return: OutputManager of the output directory.
+    """
     print(
-        "INSTRUCTION: Before you continue, make sure you have the exported Trello board csv file (trello_board.csv) in "
-        "the same directory as the "
-        "script as in the following tree:"
+        "INSTRUCTION: Before you continue, make sure you have the exported Trello board csv or json file at "
+        "{} (another path is given with --input, several boards with --boards or --manifest). The reports "
+        "are written to {} (--output-dir):".format(trello_board_path, output_dir)
     )
     print(
         r"""
     +--CURRENT_DIR/
-    |  +--trello_board.csv
-    |  +--sirg.py
-        """
+    |  +--{}
+    |  +--{}/
+        """.format(
+            os.path.relpath(trello_board_path), os.path.relpath(output_dir)
+        )
     )
     input("Press Enter to continue.")
     print("---------------------")
-    prepare_output()  # ------------------------------------------------------------------------------
-
-
-# ------------------------------------------------------------------------------
-def load_trello_board():
-    """Load the raw log file exported from LogRhythm.
-    :return: raw logfile converted to pandas dataframe.
-    """
-    print(colored("[SUCCESS]", "green"), end=".....................")
-    print("Loaded the Trello board csv file.")
-    # log = Path("11_09_2019-CE_ALL_W44.csv")
-    # if not trello_board.exists():
-    #     print("The trello_board file doesn't exist!")
-    # else:
-    #     print("The trello_board file exists!")
-    # Load dataset
-    trello_board = pd.read_csv("./INPUT/j8wC07hR - sip-soc-shared.csv")
-
-    trello_board.rename(
-        columns={
-            "Card Name": "T#",
-            "Card Description": "DESC",
-            "List Name": "STATUS",
-            "CREATION_DATE": "TICKET_CREATION_TIMESTAMP",
-            "Card ID": "TICKET_RESPONSE_TIMESTAMP",
-            "RESOLUTION_DATE": "TICKET_RESOLUTION_TIMESTAMP",
-            "CATEGORY": "CATEGORY",
-            "LOG_SOURCE": "LOG_SOURCE",
-            "PRIORITY": "PRIORITY",
-            "OFFENSE_ID": "OFFENSE_ID",
-            "RESOLUTION_CODE": "RESOLUTION_CODE",
-        },
-        inplace=True,
+    return prepare_output(output_dir, force)
+
+
+# ------------------------------------------------------------------------------
+def _import_pyarrow():
+    """Import pyarrow on first use.
+
+    pyarrow is optional, the csv file is read by the pandas C parser and the board is not cached without it.
+    :return: True when pyarrow is installed.
+    """
+    global pa, pa_compute, pa_csv, pa_feather
+    if pa is None:
+        try:
+            import pyarrow as pa
+            import pyarrow.compute as pa_compute
+            import pyarrow.csv as pa_csv
+            import pyarrow.feather as pa_feather
+        except ImportError:
+            pa = False
+    return bool(pa)
+
+
+# ------------------------------------------------------------------------------
+def _read_trello_board_chunks(path, columns, resolved_only):
+    """Read the csv file in chunks with the pandas C parser, dropping rejected rows chunk by chunk."""
+    dtypes = {
+        column: "category"
+        for column in columns
+        if TRELLO_COLUMNS[column] in CATEGORICAL_COLUMNS
+    }
+    dtypes.update({"Card Name": str, "Card Description": str, "Card ID": str, "Labels": str})
+    chunks = []
+    for chunk in pd.read_csv(
+        path,
+        usecols=columns,
+        dtype={column: dtype for column, dtype in dtypes.items() if column in columns},
+        chunksize=CHUNK_SIZE,
+    ):
+        if resolved_only:
+            chunk = chunk[
+                (chunk["List Name"] == RESOLVED_STATUS)
+                & (chunk["CATEGORY"] == INVESTIGATION_CATEGORY)
+            ]
+        chunks.append(chunk)
+    return pd.concat(chunks, ignore_index=True)
+
+
+# ------------------------------------------------------------------------------
+def _read_trello_board_arrow(path, columns, resolved_only):
+    """Stream the csv file in record batches with pyarrow, dropping rejected rows batch by batch."""
+    reader = pa_csv.open_csv(
+        path,
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=columns,
+            column_types={
+                column: pa.string()
+                for column in columns
+                if column != "OFFENSE_ID"
+            },
+            strings_can_be_null=True,
+        ),
+    )
+    batches = []
+    for batch in reader:
+        if resolved_only:
+            batch = batch.filter(
+                pa_compute.and_(
+                    pa_compute.equal(batch["List Name"], RESOLVED_STATUS),
+                    pa_compute.equal(batch["CATEGORY"], INVESTIGATION_CATEGORY),
+                )
+            )
+        batches.append(batch)
+    return pa.Table.from_batches(batches, schema=reader.schema).to_pandas()
+
+
+# ------------------------------------------------------------------------------
+class TrelloJsonStream:
+    """Elements of the top-level arrays of a Trello json export, decoded one at a time.
+
+    The export is read JSON_BLOCK_SIZE characters at a time. The board object is walked by skipping the
+    separators with a regex and every element of its arrays is decoded on its own by raw_decode, so the
+    memory used is bounded by the block size and the largest card or action instead of the export.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._decoder = json.JSONDecoder()
+        self._file = None
+        self._buffer = ""
+        self._position = 0
+
+    def _fill(self):
+        """Append the next block of the export to what is left of the buffer, False at the end of the file."""
+        block = self._file.read(JSON_BLOCK_SIZE)
+        self._buffer = self._buffer[self._position:] + block
+        self._position = 0
+        return bool(block)
+
+    def _peek(self):
+        """First character after the separators, None at the end of the file."""
+        while True:
+            self._position = JSON_SEPARATORS.match(self._buffer, self._position).end()
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._fill():
+                return None
+
+    def _decode(self):
+        """Decode the value at the position, reading more of the export until it is complete."""
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number ending with the buffer may go on in the next block
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._position = end
+            return value
+
+    def elements(self, keys):
+        """Yield (key, element) for every element of the top-level arrays named in keys, in file order.
+
+        The other values of the board are decoded and dropped, element by element for arrays.
+        """
+        with open(self.path, encoding="utf-8") as self._file:
+            self._buffer, self._position = "", 0
+            if self._peek() != "{":
+                raise ValueError("{} is not a Trello json export".format(self.path))
+            self._position += 1
+            while self._peek() not in ("}", None):
+                key = self._decode()
+                if self._peek() != "[":
+                    self._decode()
+                    continue
+                self._position += 1
+                while self._peek() != "]":
+                    if self._peek() is None:
+                        raise ValueError("{} is truncated".format(self.path))
+                    element = self._decode()
+                    if key in keys:
+                        yield key, element
+                self._position += 1
+
+
+# ------------------------------------------------------------------------------
+def _trello_json_batch(rows, columns):
+    """Turn a batch of cards into a dataframe, the dates of Trello are in UTC."""
+    batch = pd.DataFrame.from_records(rows, columns=columns)
+    for column in TIMESTAMP_COLUMNS:
+        batch[column] = (
+            pd.to_datetime(batch[column], utc=True).dt.tz_convert(TIMEZONE).dt.tz_localize(None)
+        )
+    return batch
+
+
+# ------------------------------------------------------------------------------
+def _read_trello_board_json(path, resolved_only, labels=False):
+    """Stream the cards of a Trello json export into the report columns, dropping rejected cards on the fly.
+
+    A first pass reads the lists, the custom fields and the last time every card was moved to the
+    RESOLVED_STATUS list, a second pass turns the cards into rows CHUNK_SIZE at a time. Custom fields are
+    matched on their names in TRELLO_COLUMNS, like the columns of the csv power-up, and cards without a
+    RESOLUTION_DATE are resolved when they were moved to RESOLVED_STATUS.
+    """
+    stream = TrelloJsonStream(path)
+    lists, fields, options, resolved_moves = {}, {}, {}, {}
+    for key, element in stream.elements({"lists", "customFields", "actions"}):
+        if key == "lists":
+            lists[element["id"]] = element["name"]
+        elif key == "customFields":
+            if element.get("name") in TRELLO_COLUMNS:
+                fields[element["id"]] = TRELLO_COLUMNS[element["name"]]
+                for option in element.get("options") or []:
+                    options[option["id"]] = option["value"].get("text")
+        elif element.get("type") == "updateCard":
+            data = element.get("data") or {}
+            if (data.get("listAfter") or {}).get("name") == RESOLVED_STATUS:
+                card_id = data["card"]["id"]
+                # ISO 8601 dates in UTC sort as strings
+                resolved_moves[card_id] = max(resolved_moves.get(card_id, ""), element["date"])
+
+    # Card columns first and custom fields next, like the csv power-up
+    card_columns = ["TICKET_RESPONSE_TIMESTAMP", "T#", "DESC"] + (["LABELS"] if labels else []) + ["STATUS"]
+    columns = card_columns + [
+        column for column in TRELLO_COLUMNS.values() if column not in card_columns + ["LABELS"]
+    ]
+    batches, rows = [], []
+    for _, card in stream.elements({"cards"}):
+        row = {
+            "T#": card.get("name"),
+            "DESC": card.get("desc") or None,
+            "STATUS": lists.get(card.get("idList")),
+            "TICKET_RESPONSE_TIMESTAMP": card.get("id"),
+        }
+        for item in card.get("customFieldItems") or []:
+            column = fields.get(item.get("idCustomField"))
+            if column is None:
+                continue
+            if item.get("idValue"):
+                row[column] = options.get(item["idValue"])
+            else:
+                # {"text": ...}, {"number": ...}, {"date": ...} or {"checked": ...}
+                row[column] = next(iter((item.get("value") or {}).values()), None)
+        if resolved_only and (
+            row["STATUS"] != RESOLVED_STATUS or row.get("CATEGORY") != INVESTIGATION_CATEGORY
+        ):
+            continue
+        if not row.get("TICKET_RESOLUTION_TIMESTAMP"):
+            row["TICKET_RESOLUTION_TIMESTAMP"] = resolved_moves.get(card.get("id"))
+        if labels:
+            # Same format as the Labels column of the csv power-up
+            row["LABELS"] = ", ".join(
+                "{} ({})".format(label.get("name"), label.get("color"))
+                for label in card.get("labels") or []
+            ) or None
+        rows.append(row)
+        if len(rows) == CHUNK_SIZE:
+            batches.append(_trello_json_batch(rows, columns))
+            rows = []
+    batches.append(_trello_json_batch(rows, columns))
+    trello_board = pd.concat(batches, ignore_index=True)
+    with contextlib.suppress(ValueError, TypeError):
+        trello_board["OFFENSE_ID"] = pd.to_numeric(trello_board["OFFENSE_ID"])
+    return trello_board
+
+
+# ------------------------------------------------------------------------------
+def compact_descriptions(descriptions):
+    """Remove the newlines of the descriptions and dictionary-encode them when they repeat.
+
+    Descriptions are mostly templated analyst notes: the newlines are removed once per distinct description
+    and the column is returned as a categorical while there are at most DESC_CATEGORY_RATIO distinct
+    descriptions per ticket, as objects otherwise.
+    """
+    codes, uniques = pd.factorize(descriptions)
+    # Removing the newlines can make two descriptions equal
+    cleaned_codes, cleaned_uniques = pd.factorize(
+        pd.Index(uniques, dtype=object).str.replace("\n", "", regex=False)
+    )
+    # Missing descriptions have the code -1, which picks the -1 appended to the cleaned codes
+    descriptions_cleaned = pd.Categorical.from_codes(
+        np.append(cleaned_codes, -1)[codes], categories=cleaned_uniques
     )
+    if len(cleaned_uniques) > DESC_CATEGORY_RATIO * len(descriptions):
+        descriptions_cleaned = np.asarray(descriptions_cleaned, dtype=object)
+    return pd.Series(descriptions_cleaned, index=descriptions.index, name=descriptions.name)
+
+
+# ------------------------------------------------------------------------------
+def parse_trello_board(
+    path=TRELLO_BOARD_PATH, engine=None, resolved_only=True, labels_translation=None
+):
+    """Parse the Trello board exported as a csv file, or as a json file by Trello itself.
+
+    Only the columns listed in TRELLO_COLUMNS are read. When resolved_only is set, the filter_tickets
+    predicates are applied while reading so rejected cards are never materialized.
+    :param path: path of the exported Trello board csv or json file.
+    :param engine: "pyarrow" or "c" for csv files, defaults to pyarrow when it is installed.
+    :param resolved_only: only keep resolved security investigation cards.
+    :param labels_translation: path of the labels translation csv file, the labels are decoded when it is
+        given and ignored otherwise.
+    :return: Trello board converted to pandas dataframe.
+    """
+    if path.lower().endswith(".json"):
+        trello_board = _read_trello_board_json(path, resolved_only, bool(labels_translation))
+    else:
+        if engine is None:
+            engine = "pyarrow" if _import_pyarrow() else "c"
+        header = pd.read_csv(path, nrows=0).columns
+        columns = [
+            column
+            for column in header
+            if column in TRELLO_COLUMNS and (column != "Labels" or labels_translation)
+        ]
+
+        if engine == "pyarrow" and _import_pyarrow():
+            trello_board = _read_trello_board_arrow(path, columns, resolved_only)
+        else:
+            trello_board = _read_trello_board_chunks(path, columns, resolved_only)
+
+        trello_board.rename(columns=TRELLO_COLUMNS, inplace=True)
 
     # Remove new line char since it is used EVERYWHERE
-    trello_board["DESC"] = trello_board["DESC"].str.replace("\n", "")
+    trello_board["DESC"] = compact_descriptions(trello_board["DESC"])
+    if "LABELS" in trello_board:
+        trello_board = decode_labels(trello_board, labels_translation)
+    for column in CATEGORICAL_COLUMNS:
+        if column in trello_board:
+            trello_board[column] = trello_board[column].astype("category")
+    for column in TIMESTAMP_COLUMNS:
+        if column in trello_board:
+            trello_board[column] = pd.to_datetime(trello_board[column])
+    return trello_board
+
+
+# ------------------------------------------------------------------------------
+def _trello_board_cache_key(path, resolved_only, labels_translation=None):
+    """Hash the content and the modification time of the export into a snapshot name."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    digest.update(str(os.stat(path).st_mtime_ns).encode())
+    digest.update(b"RESOLVED_ONLY" if resolved_only else b"ALL")
+    if labels_translation:
+        # Decoded labels are part of the snapshot, a new translation parses the board again
+        digest.update(json.dumps(sorted(read_labels_translation(labels_translation).items())).encode())
+    return digest.hexdigest()[:32]
+
+
+# ------------------------------------------------------------------------------
+def _evict_cached_boards(max_bytes=CACHE_MAX_BYTES):
+    """Remove the least recently used snapshots until the cache fits in max_bytes."""
+    snapshots = [
+        os.path.join(CACHE_DIR, file_name)
+        for file_name in os.listdir(CACHE_DIR)
+        if file_name.endswith(".feather")
+    ]
+    # Snapshots are touched on every hit so the modification time is the last time they were used
+    snapshot_stats = []
+    for snapshot in snapshots:
+        try:
+            snapshot_stats.append((os.stat(snapshot), snapshot))
+        except FileNotFoundError:  # evicted by the process loading another board
+            continue
+    snapshot_stats.sort(key=lambda snapshot_stat: snapshot_stat[0].st_mtime, reverse=True)
+    cache_size = 0
+    for stat, snapshot in snapshot_stats:
+        cache_size += stat.st_size
+        if cache_size > max_bytes:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(snapshot)
+
+
+# ------------------------------------------------------------------------------
+def load_trello_board(
+    path=TRELLO_BOARD_PATH,
+    engine=None,
+    resolved_only=True,
+    use_cache=True,
+    invalidate_cache=False,
+    labels_translation=None,
+):
+    """Load the Trello board, from a cached snapshot when the export was already parsed.
+
+    Snapshots are uncompressed Feather files in CACHE_DIR named after the hash of the export, they are
+    memory-mapped on later runs and evicted least recently used first once CACHE_MAX_BYTES is exceeded.
+    The cache needs pyarrow and is skipped without it.
+    :param path: path of the exported Trello board csv or json file.
+    :param engine: "pyarrow" or "c" for csv files, defaults to pyarrow when it is installed.
+    :param resolved_only: only keep resolved security investigation cards.
+    :param use_cache: read and write the snapshot cache.
+    :param invalidate_cache: drop the snapshot of this export and parse it again.
+    :param labels_translation: path of the labels translation csv file, the labels are decoded when it is
+        given.
+    :return: Trello board converted to pandas dataframe.
+    """
+    if not use_cache or not _import_pyarrow():
+        trello_board = parse_trello_board(path, engine, resolved_only, labels_translation)
+        print_status("Loaded the Trello board export.")
+        return trello_board
+
+    if not os.path.exists(CACHE_DIR):
+        os.makedirs(CACHE_DIR)
+    snapshot = os.path.join(
+        CACHE_DIR,
+        "{}.feather".format(_trello_board_cache_key(path, resolved_only, labels_translation)),
+    )
+    if invalidate_cache and os.path.exists(snapshot):
+        os.remove(snapshot)
+
+    if os.path.exists(snapshot):
+        os.utime(snapshot)
+        trello_board = pa_feather.read_table(snapshot, memory_map=True).to_pandas()
+        print_status("Loaded the Trello board from the cache.")
+        return trello_board
+
+    trello_board = parse_trello_board(path, engine, resolved_only, labels_translation)
+    # Write next to the snapshot and rename so an interrupted run never leaves a partial snapshot behind
+    pa_feather.write_feather(
+        trello_board.reset_index(drop=True),
+        snapshot + ".tmp",
+        compression="uncompressed",
+    )
+    os.replace(snapshot + ".tmp", snapshot)
+    _evict_cached_boards()
+    print_status("Loaded the Trello board export.")
     return trello_board
 
 
+# ------------------------------------------------------------------------------
+def ticket_store_path(board):
+    """Path of the ticket store of a board, every board has its own store in CACHE_DIR."""
+    return os.path.join(CACHE_DIR, TICKET_STORE_NAME.format(board))
+
+
+# ------------------------------------------------------------------------------
+def _ticket_store_snapshot(path, version):
+    """Path of the typed snapshot of a version of the ticket store, None without pyarrow."""
+    if not _import_pyarrow():
+        return None
+    return "{}.{}.feather".format(os.path.splitext(path)[0], version)
+
+
+# ------------------------------------------------------------------------------
+def _write_ticket_store_snapshot(trello_board, path, version):
+    """Write the typed snapshot of a version of the ticket store and remove the ones of older versions."""
+    snapshot = _ticket_store_snapshot(path, version)
+    if snapshot is None:
+        return
+    try:
+        pa_feather.write_feather(trello_board, snapshot + ".tmp", compression="uncompressed")
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Columns mixing numbers and text are typed again from the store on every read
+        return
+    os.replace(snapshot + ".tmp", snapshot)
+    for version in range(version):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(_ticket_store_snapshot(path, version))
+
+
+# ------------------------------------------------------------------------------
+def _type_ticket_store(trello_board):
+    """Give the rows read from the ticket store the same dtypes as load_trello_board."""
+    if "DESC" in trello_board:
+        trello_board["DESC"] = compact_descriptions(trello_board["DESC"])
+    for column in CATEGORICAL_COLUMNS:
+        if column in trello_board:
+            trello_board[column] = trello_board[column].astype(object).astype("category")
+    for column in TIMESTAMP_COLUMNS:
+        if column in trello_board:
+            trello_board[column] = pd.to_datetime(trello_board[column])
+    return trello_board
+
+
+# ------------------------------------------------------------------------------
+def _prepare_ticket_store(connection, columns):
+    """Create the tables of the store, or add the columns that appeared in a newer export."""
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS tickets ("T#" TEXT PRIMARY KEY, ROW_HASH INTEGER)'
+    )
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS exports (EXPORT_KEY TEXT PRIMARY KEY, VALIDATION TEXT)"
+    )
+    if "VALIDATION" not in [row[1] for row in connection.execute("PRAGMA table_info(exports)")]:
+        # Exports of an older version of the store are taken as not validated
+        connection.execute("ALTER TABLE exports ADD COLUMN VALIDATION TEXT")
+    stored_columns = [
+        row[1] for row in connection.execute("PRAGMA table_info(tickets)")
+    ]
+    for column in columns:
+        if column not in stored_columns:
+            connection.execute('ALTER TABLE tickets ADD COLUMN "{}"'.format(column))
+
+
+# ------------------------------------------------------------------------------
+def is_stored_export(export_key, path, validation=None):
+    """Whether an export was already upserted into the ticket store.
+    :param export_key: key of the export, see _trello_board_cache_key.
+    :param path: path of the SQLite ticket store.
+    :param validation: validation the export must have been upserted with, see _validation_key, any
+        upsert will do when it is None.
+    :return: True when the export with that key was upserted.
+    """
+    if not os.path.exists(path):
+        return False
+    with contextlib.closing(sqlite3.connect(path)) as connection:
+        try:
+            stored = connection.execute(
+                "SELECT VALIDATION FROM exports WHERE EXPORT_KEY = ?", (export_key,)
+            ).fetchone()
+        except sqlite3.OperationalError:  # store of an older version, without the VALIDATION of the exports
+            return False
+    return stored is not None and (validation is None or stored[0] == validation)
+
+
+# ------------------------------------------------------------------------------
+def update_ticket_store(trello_board, path, export_key=None, quarantined=(), validation=None):
+    """Upsert the new and changed cards of an export into the ticket store.
+
+    Cards are keyed on T# and compared through a hash of their row, so only the delta with the previous
+    exports is written. Cards missing from the export stay in the store to keep the history of the board,
+    cards without a T# cannot be keyed and are left out, and of the cards sharing a T# only the last one is
+    kept, which is why exports are checked by validate_export first. An upsert that changed cards bumps the
+    version of the store and patches the typed snapshot of the previous version with them, so
+    read_ticket_store does not read and type the whole store again.
+    :param trello_board: Trello board as returned by load_trello_board.
+    :param path: path of the SQLite ticket store.
+    :param export_key: key of the export, recorded so is_stored_export skips it next time.
+    :param quarantined: T# of the quarantined tickets, they are not upserted and their stored copies are
+        removed.
+    :param validation: validation the export went through, see _validation_key, None when it was not
+        validated.
+    :return: number of upserted cards.
+    """
+    quarantined = pd.unique(pd.Series(quarantined, dtype=object).dropna())
+    trello_board = trello_board[
+        trello_board["T#"].notna() & ~trello_board["T#"].isin(quarantined)
+    ].drop_duplicates(subset="T#", keep="last")
+    row_hashes = pd.util.hash_pandas_object(trello_board, index=False).to_numpy().astype("int64")
+    columns = list(trello_board.columns)
+
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    with contextlib.closing(sqlite3.connect(path)) as connection, connection:
+        _prepare_ticket_store(connection, columns)
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        snapshot = _ticket_store_snapshot(path, version)
+        if snapshot and os.path.exists(snapshot):
+            stored = pa_feather.read_table(
+                snapshot, columns=["T#", "ROW_HASH"], memory_map=True
+            ).to_pandas()
+        else:
+            snapshot = None
+            stored = pd.read_sql_query(
+                'SELECT "T#", ROW_HASH FROM tickets WHERE "T#" IS NOT NULL', connection
+            )
+        stored_hashes = pd.Series(stored["ROW_HASH"].to_numpy(), index=stored["T#"].to_numpy())
+        # Cards new to the store are NaN, which differs from every hash
+        changed = stored_hashes.reindex(trello_board["T#"].to_numpy()).to_numpy() != row_hashes
+        delta = trello_board[changed]
+
+        delta = delta.astype(
+            {column: object for column in delta.columns if column in CATEGORICAL_COLUMNS}
+        )
+        for column in TIMESTAMP_COLUMNS:
+            if column in delta:
+                delta[column] = delta[column].dt.strftime("%Y-%m-%d %H:%M:%S")
+        delta = delta.astype(object).where(delta.notna(), None)
+        delta.insert(1, "ROW_HASH", row_hashes[changed].astype(object))
+        connection.executemany(
+            "INSERT OR REPLACE INTO tickets ({}) VALUES ({})".format(
+                ", ".join('"{}"'.format(column) for column in delta.columns),
+                ", ".join("?" * len(delta.columns)),
+            ),
+            delta.itertuples(index=False, name=None),
+        )
+        removed = connection.executemany(
+            'DELETE FROM tickets WHERE "T#" = ?', ((ticket,) for ticket in quarantined)
+        ).rowcount
+        if export_key:
+            connection.execute(
+                "INSERT OR REPLACE INTO exports (EXPORT_KEY, VALIDATION) VALUES (?, ?)",
+                (export_key, validation),
+            )
+        if len(delta) or removed > 0:
+            connection.execute("PRAGMA user_version = {}".format(version + 1))
+
+    if (len(delta) or removed > 0) and snapshot:
+        previous = pa_feather.read_table(snapshot, memory_map=True).to_pandas()
+        frames = [
+            previous[~previous["T#"].isin(delta["T#"]) & ~previous["T#"].isin(quarantined)]
+        ]
+        if len(delta):
+            # Replaced rows go to the end of the store, like the rows INSERT OR REPLACE reinserted
+            frames.append(_type_ticket_store(delta.infer_objects()))
+        _write_ticket_store_snapshot(
+            _type_ticket_store(pd.concat(frames, ignore_index=True)), path, version + 1
+        )
+
+    print_status("Upserted {} new or changed cards into the ticket store.".format(len(delta)))
+    return len(delta)
+
+
+# ------------------------------------------------------------------------------
+def read_ticket_store(path):
+    """Read every card kept in the ticket store with the same dtypes as load_trello_board.
+
+    The typed cards of the current version of the store are kept in a Feather snapshot next to it, they are
+    only read from SQLite and typed again when the snapshot is missing.
+    :param path: path of the SQLite ticket store.
+    :return: Trello board converted to pandas dataframe.
+    """
+    with contextlib.closing(sqlite3.connect(path)) as connection:
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        snapshot = _ticket_store_snapshot(path, version)
+        if snapshot and os.path.exists(snapshot):
+            os.utime(snapshot)
+            trello_board = pa_feather.read_table(snapshot, memory_map=True).to_pandas()
+        else:
+            trello_board = _type_ticket_store(
+                pd.read_sql_query("SELECT * FROM tickets", connection)
+            )
+            # The hashes are kept in the snapshot for the next upsert
+            _write_ticket_store_snapshot(trello_board, path, version)
+    print_status("Loaded {} cards from the ticket store.".format(len(trello_board)))
+    return trello_board.drop(columns="ROW_HASH")
+
+
 # ------------------------------------------------------------------------------
 def calulate_default_start_and_end_dates():
     today = pd.to_datetime("today").normalize()
@@ -172,34 +1204,39 @@ def specify_report_time_range():
     return start_timestamp, end_timestamp
 
 
+# ------------------------------------------------------------------------------
+def index_trello_board(trello_board):
+    """Sort the board by creation time behind a DatetimeIndex so report windows are binary searched.
+
+    The timestamps are parsed here once per load. Tickets without a creation timestamp never fall in a
+    report window and are left out of the index.
+    """
+    for column in TIMESTAMP_COLUMNS:
+        if not pd.api.types.is_datetime64_any_dtype(trello_board[column]):
+            trello_board[column] = pd.to_datetime(trello_board[column])
+    trello_board = trello_board[trello_board["TICKET_CREATION_TIMESTAMP"].notna()]
+    trello_board = trello_board.sort_values(by=["TICKET_CREATION_TIMESTAMP"], kind="stable")
+    trello_board.index = pd.DatetimeIndex(trello_board["TICKET_CREATION_TIMESTAMP"], name=None)
+    return trello_board
+
+
 # ------------------------------------------------------------------------------
 def process_timestamps(trello_board, start_timestamp, end_timestamp):
-    # Convert timestamps datetime objects
-    trello_board["TICKET_CREATION_TIMESTAMP"] = pd.to_datetime(
-        trello_board["TICKET_CREATION_TIMESTAMP"]
-    )
-    trello_board["TICKET_RESOLUTION_TIMESTAMP"] = pd.to_datetime(
-        trello_board["TICKET_RESOLUTION_TIMESTAMP"]
-    )
+    """Slice the tickets created in [start_timestamp, end_timestamp) out of the board.
 
-    # Generate start and end date of the trello table
-    trello_board.start_timestamp = (
-        trello_board["TICKET_CREATION_TIMESTAMP"].min().strftime("%d/%m/%Y|%H:%M:%S")
-    )
-    trello_board.end_timestamp = (
-        trello_board["TICKET_CREATION_TIMESTAMP"].max().strftime("%d/%m/%Y|%H:%M:%S")
-    )
-    trello_board.no_days = len(
-        trello_board["TICKET_CREATION_TIMESTAMP"].dt.normalize().unique()
+    The window is found by binary search on the index set by index_trello_board and returned as a slice
+    of the board, without parsing the timestamps or copying the tickets again. Boards without that index
+    are indexed first.
+    """
+    if not (
+        isinstance(trello_board.index, pd.DatetimeIndex)
+        and trello_board.index.is_monotonic_increasing
+    ):
+        trello_board = index_trello_board(trello_board)
+    first_ticket, last_ticket = trello_board.index.searchsorted(
+        [pd.Timestamp(start_timestamp), pd.Timestamp(end_timestamp)]
     )
-    trello_board = trello_board[
-        (trello_board["TICKET_CREATION_TIMESTAMP"] >= start_timestamp)
-    ]
-    trello_board = trello_board[
-        (trello_board["TICKET_CREATION_TIMESTAMP"] < end_timestamp)
-    ]
-
-    return trello_board
+    return trello_board.iloc[first_ticket:last_ticket]
 
 
 # ------------------------------------------------------------------------------
@@ -207,276 +1244,653 @@ def filter_tickets(trello_board):
     # Only analyze resolved tickets
     trello_board = trello_board[trello_board["STATUS"] == "RESOLVED_AND_REVIEWED"]
     trello_board = trello_board[trello_board["CATEGORY"] == "VSOC_INVESTIGATION"]
-    trello_board = trello_board.sort_values(by=["T#"], ignore_index=True)
-    print(colored("[SUCCESS]", "green"), end=".....................")
-    print("Filtered out non-resolved and non-security investigation cards.")
-
-    if DEBUG:
-        trello_board[trello_board.isna().any(axis=1)]
+    print_status("Filtered out non-resolved and non-security investigation cards.")
     return trello_board
 
 
 # ------------------------------------------------------------------------------
-# Deprecated
-# def get_card_creation_date(trello_board):
-#     trello_board['TICKET_RESPONSE_TIMESTAMP'] = [x[:8] for x in trello_board['TICKET_RESPONSE_TIMESTAMP']]
-#     trello_board['TICKET_RESPONSE_TIMESTAMP'] = trello_board['TICKET_RESPONSE_TIMESTAMP'].apply(int, base=16)
-#     trello_board['TICKET_RESPONSE_TIMESTAMP'] = pd.to_datetime(trello_board['TICKET_RESPONSE_TIMESTAMP'],unit='s')
-#     trello_board['TICKET_RESPONSE_TIMESTAMP'] = trello_board['TICKET_RESPONSE_TIMESTAMP'].dt.tz_localize('GMT').dt.tz_convert('Asia/Riyadh').dt.tz_localize(None)
-
-#     trello_board['TICKET_CREATION_TIMESTAMP_ADJUSTED'] = trello_board['TICKET_CREATION_TIMESTAMP']
-#     trello_board['TICKET_RESPONSE_TIMESTAMP_ADJUSTED'] = trello_board['TICKET_RESPONSE_TIMESTAMP']
-#     trello_board['TICKET_RESOLUTION_TIMESTAMP_ADJUSTED'] = trello_board['TICKET_RESOLUTION_TIMESTAMP']
-#     if DEBUG:
-#         display(trello_board[trello_board['TICKET_CREATION_TIMESTAMP'].isnull()])
-#         display(trello_board[trello_board['TICKET_RESOLUTION_TIMESTAMP'].isnull()])    # Check if we have error in timestamps
-#         trello_board['ERROR'] = (trello_board['TICKET_CREATION_TIMESTAMP'
-#                                 ].dt.second
-#                                 >= trello_board['TICKET_RESOLUTION_TIMESTAMP'
-#                                 ].dt.second).astype(int)
-
-#     display(trello_board[trello_board.duplicated('T#')])
-#     trello_board.drop_duplicates(subset ="T#",keep = False, inplace = True)
-#     return trello_board
-
-# ------------------------------------------------------------------------------
-# TODO: Fix it
-# def offset_business_hours(trello_board):
-#     sip_bh = pd.offsets.CustomBusinessHour(
-#         start="08:15", end="15:30", weekmask="Sun Mon Tue Wed Thu"
-#     )
-#     trello_board["TICKET_RESPONSE_TIMESTAMP"] = [
-#         x[:8] for x in trello_board["TICKET_RESPONSE_TIMESTAMP"]
-#     ]
-#     trello_board["TICKET_RESPONSE_TIMESTAMP"] = trello_board[
-#         "TICKET_RESPONSE_TIMESTAMP"
-#     ].apply(int, base=16)
-#     trello_board["TICKET_RESPONSE_TIMESTAMP"] = pd.to_datetime(
-#         trello_board["TICKET_RESPONSE_TIMESTAMP"], unit="s"
-#     )
-#     trello_board["TICKET_RESPONSE_TIMESTAMP"] = (
-#         trello_board["TICKET_RESPONSE_TIMESTAMP"]
-#         .dt.tz_localize("GMT")
-#         .dt.tz_convert("Asia/Riyadh")
-#         .dt.tz_localize(None)
-#     )
-
-#     trello_board["TICKET_CREATION_TIMESTAMP_ADJUSTED"] = trello_board[
-#         "TICKET_CREATION_TIMESTAMP"
-#     ]
-#     trello_board["TICKET_RESPONSE_TIMESTAMP_ADJUSTED"] = trello_board[
-#         "TICKET_RESPONSE_TIMESTAMP"
-#     ]
-#     trello_board["TICKET_RESOLUTION_TIMESTAMP_ADJUSTED"] = trello_board[
-#         "TICKET_RESOLUTION_TIMESTAMP"
-#     ]
-
-#     for index, row in trello_board.iterrows():
-#         roll1 = sip_bh.rollforward(
-#             pd.Timestamp(trello_board["TICKET_CREATION_TIMESTAMP"][index])
-#         )
-#         trello_board["TICKET_CREATION_TIMESTAMP_ADJUSTED"][index] = roll1
-#         roll2 = sip_bh.rollforward(
-#             pd.Timestamp(trello_board["TICKET_RESPONSE_TIMESTAMP"][index])
-#         )
-#         trello_board["TICKET_RESPONSE_TIMESTAMP_ADJUSTED"][index] = roll2
-#         roll3 = sip_bh.rollforward(
-#             pd.Timestamp(trello_board["TICKET_RESOLUTION_TIMESTAMP"][index])
-#         )
-#         trello_board["TICKET_RESOLUTION_TIMESTAMP_ADJUSTED"][index] = roll3
-
-#     trello_board["BUSINESS_HOURS_TO_ACKNOWLEDGE"] = trello_board.apply(
-#         lambda x: len(
-#             pd.date_range(
-#                 start=x.TICKET_CREATION_TIMESTAMP,
-#                 end=x.TICKET_RESPONSE_TIMESTAMP,
-#                 freq=sip_bh,
-#             )
-#         ),
-#         axis=1,
-#     )
-#     trello_board["BUSINESS_HOURS_TO_RESOLVE"] = trello_board.apply(
-#         lambda x: len(
-#             pd.date_range(
-#                 start=x.TICKET_CREATION_TIMESTAMP,
-#                 end=x.TICKET_RESOLUTION_TIMESTAMP,
-#                 freq=sip_bh,
-#             )
-#         ),
-#         axis=1,
-#     )
-
-#     # TICKETS/BUSINESS HOURS ratio
-#     tickets_business_hours_ratio = len(trello_board) / len(
-#         pd.bdate_range(
-#             start=trello_board["TICKET_CREATION_TIMESTAMP"].min(),
-#             end=trello_board["TICKET_CREATION_TIMESTAMP"].max(),
-#             freq=sip_bh,
-#         )
-#     )
-
-#     # print(
-#     #     "Rate of resolved VSOC ticket per business hour = ",
-#     #     tickets_business_hours_ratio,
-#     #     "tickets per business hour",
-#     # )
-#     print(colored('[SUCCESS]', 'green'), end='.....................')
-#     print('Offseted business hours.')
-#     return trello_board
-
-
-# ------------------------------------------------------------------------------
-# Deprecated
-# def extract_labels(trello_board):
-#     # Handle labels
-#     labels_dict = {'SC' : 'SEC_CONTROL', 'RC' : 'RESOLUTION_CODE', 'CO' : 'DEPENDENT_ON', 'TB' : 'ROOTICKET_CAUSE',
-#     'PR' : 'PRIORITY'}
-#     trello_board["LABELS"] = trello_board["LABELS"].str.replace('\([^)]*\)', '', regex=True)
-#     trello_board["LABELS"] = trello_board["LABELS"].str.replace(',', ' ', regex=True)
-#     #  Temp. solution :)
-#     trello_board['SEC_CONTROL'] = trello_board['LABELS'].str.extract(r'(\bSC\d{2}\b)')
-#     trello_board['RESOLUTION_CODE'] = trello_board['LABELS'].str.extract(r'(\bRC\d{2}\b)')
-#     trello_board['DEPENDENT_ON'] = trello_board['LABELS'].str.extract(r'(\bCO\d{2}\b)')
-#     trello_board['ROOT_CAUSE'] = trello_board['LABELS'].str.extract(r'(\bTB\d{2}\b)')
-#     trello_board['PRIORITY'] = trello_board['LABELS'].str.extract(r'(\bPR\d{2}\b)')
-#     # Load labels translation as a separate external file to keep the confidentiality of your log sources
-#     labels_translation = pd.read_csv('./INPUT/labels_translation.csv', index_col=0, header=None, squeeze=True).
-#     to_dict()
-#     # print(labels_translation)
-#     trello_board = trello_board.replace(labels_translation)
-#     trello_board.drop('LABELS', axis=1, inplace=True)
-#     return trello_board
-
-# ------------------------------------------------------------------------------
-def gen_barplot(trello_board):
-    required_fields = ["LOG_SOURCE", "RESOLUTION_CODE"]
+def validate_tickets(trello_board, output_dir=OUTPUT_DIR, earliest_date=EARLIEST_DATE):
+    """Quarantine the tickets that would skew the counts and the SLAs, in a single vectorized pass.
 
-    trello_board.start_timestamp = (
-        trello_board["TICKET_CREATION_TIMESTAMP"].min().strftime("%d/%m/%Y|%H:%M:%S")
-    )
-    trello_board.end_timestamp = (
-        trello_board["TICKET_CREATION_TIMESTAMP"].max().strftime("%d/%m/%Y|%H:%M:%S")
-    )
-    trello_board.no_days = len(
-        trello_board["TICKET_CREATION_TIMESTAMP"].dt.normalize().unique()
+    Every check of VALIDATION_CHECKS is a boolean mask over the whole board: ticket numbers seen more than
+    once, found through a hash table of T#, missing REQUIRED_COLUMNS, resolutions before the creation, and
+    creation or resolution timestamps out of range, i.e. before earliest_date or later than the time of the
+    run widened by TIMESTAMP_MARGIN.
+    :param trello_board: Trello board as returned by filter_tickets.
+    :param output_dir: directory QUARANTINE_NAME is written to, empty when no ticket is quarantined, nothing
+        is written when it is None.
+    :param earliest_date: earliest valid date of the timestamps (yyyy-mm-dd), only future timestamps are out
+        of range when it is None.
+    :return: (Trello board without the quarantined tickets, dict of the number of tickets failing every check).
+    """
+    timestamps = trello_board[[column for column in TIMESTAMP_COLUMNS if column in trello_board]]
+    first_timestamp = pd.Timestamp(earliest_date) if earliest_date else np.datetime64("NaT")
+    last_timestamp = pd.Timestamp.now(tz=TIMEZONE).tz_localize(None) + TIMESTAMP_MARGIN
+
+    failed = np.column_stack(
+        [
+            trello_board["T#"].duplicated(keep=False).to_numpy(),
+            trello_board[[column for column in REQUIRED_COLUMNS if column in trello_board]]
+            .isna()
+            .to_numpy()
+            .any(axis=1),
+            (
+                trello_board["TICKET_RESOLUTION_TIMESTAMP"] < trello_board["TICKET_CREATION_TIMESTAMP"]
+            ).to_numpy(),
+            ((timestamps < first_timestamp) | (timestamps > last_timestamp)).to_numpy().any(axis=1),
+        ]
     )
+    quarantined = failed.any(axis=1)
+    counts = dict(zip(VALIDATION_CHECKS, failed.sum(axis=0).tolist()))
+    counts["QUARANTINED"] = int(quarantined.sum())
+    if output_dir is not None:
+        # Written even when it is empty, so the tickets of a previous run are never listed again
+        quarantine = trello_board.loc[
+            quarantined, [column for column in QUARANTINE_COLUMNS if column in trello_board]
+        ].reset_index(drop=True)
+        # Names of the failed checks of every quarantined ticket, e.g. DUPLICATE_TICKET|MISSING_FIELD
+        quarantine["CHECKS"] = [
+            "|".join(np.compress(row, VALIDATION_CHECKS)) for row in failed[quarantined]
+        ]
+        write_csv(quarantine, os.path.join(output_dir, QUARANTINE_NAME), index=False)
+    if not counts["QUARANTINED"]:
+        print_status("Validated {} tickets.".format(len(trello_board)))
+        return trello_board, counts
 
-    for required_field in required_fields:
-        copy_of_trello_board = trello_board.copy()
-        series = pd.value_counts(copy_of_trello_board[required_field])
-        mask = (series / series.sum() * 100).lt(1.0)
-        required_field_count = copy_of_trello_board[required_field].value_counts()
-        required_field_count = required_field_count.rename_axis(
-            required_field
-        ).reset_index(name="{}_COUNT".format(required_field))
-        required_field_count = required_field_count.reset_index(drop=True)
-        required_field_count.index.rename("NO.", inplace=True)
-        required_field_count.index += 1
-        required_field_count["{}_PCT".format(required_field)] = (
-            required_field_count["{}_COUNT".format(required_field)]
-            / required_field_count["{}_COUNT".format(required_field)].sum()
-        )
-        report_start_date_abbreviated = (
-            trello_board["TICKET_CREATION_TIMESTAMP"].min().strftime("%d%b%y")
-        ).upper()
-        report_end_date_abbreviated = (
-            trello_board["TICKET_CREATION_TIMESTAMP"].max().strftime("%d%b%y")
-        ).upper()
-        required_field_count.to_csv(
-            "./OUTPUT/[{}-{}]{}.csv".format(
-                report_start_date_abbreviated,
-                report_end_date_abbreviated,
-                required_field,
+    print_status(
+        "Quarantined {} of {} tickets: {}.".format(
+            counts["QUARANTINED"],
+            len(trello_board),
+            ", ".join(
+                "{} {}".format(counts[check], check) for check in VALIDATION_CHECKS if counts[check]
             ),
-            sep=",",
-        )
-        fig = go.Figure(
-            data=[
-                go.Pie(
-                    labels=required_field_count[required_field],
-                    values=required_field_count["{}_PCT".format(required_field)],
-                    textinfo="label+percent",
-                    insidetextorientation="radial",
-                    showlegend=False,
-                    marker=dict(colors=COLORS, line=dict(color="#000000", width=2)),
-                )
-            ]
-        )
-        fig.update_layout(
-            title="Security Investigation Tickets distributed by<br> {}".format(
-                required_field
-            )
-        )
-        # fig.layout.images = [dict( source=logo_path, xref='paper', yref='paper', x=0.97,  y=0.97, sizex=0.50,
-        # sizey=0.50, xanchor='center', yanchor='bottom')]
-        report_start_date_abbreviated = (
-            trello_board["TICKET_CREATION_TIMESTAMP"].min().strftime("%d%b%y")
-        ).upper()
-        report_end_date_abbreviated = (
-            trello_board["TICKET_CREATION_TIMESTAMP"].max().strftime("%d%b%y")
-        ).upper()
-        fig.write_image(
-            "./OUTPUT/[{}-{}]{}_COUNT.svg".format(
-                report_start_date_abbreviated,
-                report_end_date_abbreviated,
-                required_field,
-            )
-        )
-        print(colored("[SUCCESS]", "green"), end=".....................")
-        print("Barplot chart generated and exported.")
+        ),
+        "[WARNING]",
+        "yellow",
+    )
+    return trello_board[~quarantined], counts
 
 
 # ------------------------------------------------------------------------------
-def gen_summary_table(trello_board):
-    # Generate a summary table of the main features
-    duration_start = (
-        trello_board["TICKET_CREATION_TIMESTAMP"].min().strftime("%Y-%m-%d")
-    )
-    # print(duration_start)
-    summary_table_count = trello_board.groupby(["RESOLUTION_CODE"]).size()
-    report_start_date_abbreviated = (
-        trello_board["TICKET_CREATION_TIMESTAMP"].min().strftime("%d%b%y")
-    ).upper()
-    report_end_date_abbreviated = (
-        trello_board["TICKET_CREATION_TIMESTAMP"].max().strftime("%d%b%y")
-    ).upper()
-    summary_table_count.to_excel(
-        "./OUTPUT/[{}-{}]SUMMARY_TABLE_COUNT.xlsx".format(
-            report_start_date_abbreviated, report_end_date_abbreviated, duration_start
-        )
-    )
-    print(colored("[SUCCESS]", "green"), end=".....................")
-    print("Sumamry table generated and exported.")
+def validate_export(trello_board, output_dir=OUTPUT_DIR, earliest_date=EARLIEST_DATE):
+    """Validate the resolved cards of an export before it is upserted into the ticket store.
+
+    The store keeps a single card per T#, so duplicated tickets are only seen in the export.
+    :param trello_board: Trello board as returned by load_trello_board with resolved_only=False.
+    :param output_dir: directory QUARANTINE_NAME is written to, nothing is written when it is None.
+    :param earliest_date: earliest valid date of the timestamps, see validate_tickets.
+    :return: (T# of the quarantined tickets, dict of the number of tickets failing every check).
+    """
+    resolved = filter_tickets(trello_board)
+    validated, counts = validate_tickets(resolved, output_dir, earliest_date)
+    return resolved.loc[~resolved.index.isin(validated.index), "T#"], counts
 
 
 # ------------------------------------------------------------------------------
-def gen_trendline(trello_board):
-    trello_board.start_timestamp = (
-        trello_board["TICKET_CREATION_TIMESTAMP"].min().strftime("%d/%m/%Y|%H:%M:%S")
-    )
-    trello_board.end_timestamp = (
-        trello_board["TICKET_CREATION_TIMESTAMP"].max().strftime("%d/%m/%Y|%H:%M:%S")
-    )
-    trello_board.no_days = len(
-        trello_board["TICKET_CREATION_TIMESTAMP"].dt.normalize().unique()
-    )
+def _validation_key(earliest_date=EARLIEST_DATE):
+    """Validation of an export recorded in the ticket store, the OUT_OF_RANGE check depends on earliest_date."""
+    if not earliest_date:
+        return "VALIDATED"
+    return "VALIDATED_SINCE_{}".format(pd.Timestamp(earliest_date).date())
 
-    tickets_count = trello_board["T#"].value_counts()
-    tickets_count = tickets_count.rename_axis("T#").reset_index(name="T#_COUNT")
-    tickets_count = tickets_count.reset_index(drop=True)
-    tickets_count.index.rename("NO.", inplace=True)
-    tickets_count.index += 1
-    tickets_count["T#_PCT"] = (
-        tickets_count["T#_COUNT"] / tickets_count["T#_COUNT"].sum()
-    )
-    s = pd.to_datetime(trello_board["TICKET_CREATION_TIMESTAMP"])
-    tickets_count = s.groupby(s.dt.floor("d")).size().reset_index(name="COUNT")
 
-    # Plot ---------------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+def load_unstored_export(
+    path,
+    ticket_store,
+    validate=True,
+    earliest_date=EARLIEST_DATE,
+    run_log=RUN_LOG,
+    board=None,
+    output_dir=OUTPUT_DIR,
+    use_cache=True,
+    invalidate_cache=False,
+    labels_translation=None,
+):
+    """Load and validate an export before it is upserted into the ticket store, unless it is stored already.
 
-    my_layout = go.Layout(font=dict(color="#7f7f7f"))
-    my_data = go.Scatter(
-        x=tickets_count["TICKET_CREATION_TIMESTAMP"],
+    Duplicated tickets are only seen in the export, see validate_export, so the validation every export was
+    upserted with is recorded in the store, and an export upserted without that validation is loaded and
+    validated again.
+    :param path: path of the exported Trello board csv or json file.
+    :param ticket_store: path of the SQLite ticket store.
+    :param validate: quarantine the tickets failing validate_export.
+    :param earliest_date: earliest valid date of the timestamps, see validate_tickets.
+    :param run_log: RunLog the load and validate steps are measured in.
+    :return: (export, export key, validation, T# of the quarantined tickets) tuple to upsert with
+        update_ticket_store, the export is None when it is already stored.
+    """
+    export_key = _trello_board_cache_key(path, False, labels_translation)
+    validation = _validation_key(earliest_date) if validate else None
+    if not invalidate_cache and is_stored_export(export_key, ticket_store, validation):
+        return None, export_key, validation, ()
+    with run_log.stage("load", output_dir=output_dir, board=board) as record:
+        export = load_trello_board(
+            path,
+            resolved_only=False,
+            use_cache=use_cache,
+            invalidate_cache=invalidate_cache,
+            labels_translation=labels_translation,
+        )
+        record["rows_out"] = len(export)
+    quarantined = ()
+    if validate:
+        with run_log.stage("validate", len(export), output_dir=output_dir, board=board) as record:
+            quarantined, record["checks"] = validate_export(export, output_dir, earliest_date)
+            record["rows_out"] = len(export) - len(quarantined)
+    return export, export_key, validation, quarantined
+
+
+# ------------------------------------------------------------------------------
+class BusinessCalendar:
+    """Working days and hours the SLAs are measured in.
+
+    A timestamp is placed on a business clock: the working days before its day times the length of a
+    working day, plus the working time already spent on its day. The working days before every day are a
+    cumulative sum over a calendar precomputed for the whole board, so measuring any number of intervals
+    is a few vectorized numpy operations instead of a business hour offset per row.
+    """
+
+    def __init__(
+        self,
+        start=BUSINESS_HOURS_START,
+        end=BUSINESS_HOURS_END,
+        weekmask=BUSINESS_WEEKMASK,
+        holidays=(),
+    ):
+        self.opening = pd.Timedelta("{}:00".format(start)).to_timedelta64()
+        self.closing = pd.Timedelta("{}:00".format(end)).to_timedelta64()
+        self.weekmask = weekmask
+        self.holidays = np.array(holidays, dtype="datetime64[D]")
+
+    def _clock(self, timestamps, first_day, working_days_before):
+        """Working time between the first day of the calendar and every timestamp, as timedelta64[ns]."""
+        days = timestamps.astype("datetime64[D]")
+        intraday = np.clip(
+            timestamps - days.astype("datetime64[ns]"), self.opening, self.closing
+        ) - self.opening
+        intraday[~np.is_busday(days, weekmask=self.weekmask, holidays=self.holidays)] = 0
+        return working_days_before[(days - first_day).astype("int64")] * (
+            self.closing - self.opening
+        ) + intraday
+
+    def business_hours(self, start_timestamps, end_timestamps):
+        """Working hours elapsed between every pair of timestamps.
+
+        The hours are counted from the start rolled forward to the next working time. floor(hours) + 1 is
+        what len(pd.date_range(start, end, freq=CustomBusinessHour(...))) used to count, except when the
+        hours are a whole number of working days since pandas moves that last tick to the next opening.
+        Pairs with a missing timestamp are NaN and pairs ending before they start are 0.
+        :param start_timestamps: Series of start timestamps.
+        :param end_timestamps: Series of end timestamps.
+        :return: numpy array of hours.
+        """
+        start_timestamps = start_timestamps.to_numpy(dtype="datetime64[ns]")
+        end_timestamps = end_timestamps.to_numpy(dtype="datetime64[ns]")
+        known = ~(np.isnat(start_timestamps) | np.isnat(end_timestamps))
+        hours = np.full(len(start_timestamps), np.nan)
+        if not known.any():
+            return hours
+        start_timestamps, end_timestamps = start_timestamps[known], end_timestamps[known]
+
+        first_day = min(start_timestamps.min(), end_timestamps.min()).astype("datetime64[D]")
+        last_day = max(start_timestamps.max(), end_timestamps.max()).astype("datetime64[D]")
+        is_working_day = np.is_busday(
+            np.arange(first_day, last_day + 1),
+            weekmask=self.weekmask,
+            holidays=self.holidays,
+        )
+        working_days_before = np.concatenate([[0], np.cumsum(is_working_day)[:-1]])
+
+        elapsed = self._clock(
+            end_timestamps, first_day, working_days_before
+        ) - self._clock(start_timestamps, first_day, working_days_before)
+        hours[known] = np.maximum(elapsed / np.timedelta64(1, "h"), 0)
+        return hours
+
+
+# ------------------------------------------------------------------------------
+def decode_card_timestamps(card_ids):
+    """Recover the creation time of Trello cards from the timestamp in the first 8 hex digits of their ID.
+
+    The IDs are truncated to 8 characters in a fixed-width numpy array whose code points are decoded through
+    a lookup table, so the whole column is decoded without a Python call per card. Missing or malformed IDs,
+    non-ASCII ones included, are NaT.
+    :param card_ids: Series of Trello card IDs.
+    :return: Series of naive timestamps in TIMEZONE.
+    """
+    missing = card_ids.isna().to_numpy()
+    prefixes = np.asarray(card_ids.fillna("").astype(str), dtype="U8")
+    # Code points past the lookup table are not hex digits either
+    code_points = np.minimum(prefixes.view(np.uint32).reshape(-1, 8), len(HEX_DIGITS) - 1)
+    digits = HEX_DIGITS[code_points]
+    malformed = missing | (digits == 255).any(axis=1)
+    digits[malformed] = 0
+    seconds = digits.astype(np.int64) @ (16 ** np.arange(7, -1, -1, dtype=np.int64))
+    card_timestamps = (
+        pd.DatetimeIndex(seconds.astype("datetime64[s]"))
+        .tz_localize("UTC")
+        .tz_convert(TIMEZONE)
+        .tz_localize(None)
+        .to_numpy()
+    )
+    card_timestamps[malformed] = np.datetime64("NaT")
+    return pd.Series(card_timestamps, index=card_ids.index)
+
+
+# ------------------------------------------------------------------------------
+def offset_business_hours(trello_board, calendar=None):
+    """Measure the time to acknowledge and to resolve every ticket in business hours.
+
+    The card creation time decoded from the card ID is the moment the ticket was acknowledged, it replaces
+    the card ID in TICKET_RESPONSE_TIMESTAMP.
+    :param trello_board: Trello board as returned by filter_tickets.
+    :param calendar: BusinessCalendar, the SIP business hours by default.
+    :return: Trello board with the BUSINESS_HOURS_TO_ACKNOWLEDGE and BUSINESS_HOURS_TO_RESOLVE columns.
+    """
+    calendar = calendar or BusinessCalendar()
+    if not pd.api.types.is_datetime64_any_dtype(trello_board["TICKET_RESPONSE_TIMESTAMP"]):
+        trello_board["TICKET_RESPONSE_TIMESTAMP"] = decode_card_timestamps(
+            trello_board["TICKET_RESPONSE_TIMESTAMP"]
+        )
+    trello_board["BUSINESS_HOURS_TO_ACKNOWLEDGE"] = calendar.business_hours(
+        trello_board["TICKET_CREATION_TIMESTAMP"],
+        trello_board["TICKET_RESPONSE_TIMESTAMP"],
+    ).round(2)
+    trello_board["BUSINESS_HOURS_TO_RESOLVE"] = calendar.business_hours(
+        trello_board["TICKET_CREATION_TIMESTAMP"],
+        trello_board["TICKET_RESOLUTION_TIMESTAMP"],
+    ).round(2)
+    print_status("Offseted business hours.")
+    return trello_board
+
+
+# ------------------------------------------------------------------------------
+@functools.lru_cache(maxsize=8)
+def _read_labels_translation(path, mtime_ns):
+    """Read the labels translation once per modification of the file."""
+    translation = pd.read_csv(path, index_col=0, header=None, dtype=str).iloc[:, 0]
+    return translation.dropna().to_dict()
+
+
+# ------------------------------------------------------------------------------
+def read_labels_translation(path=LABELS_TRANSLATION_PATH):
+    """Read the label codes and their names, kept as a separate file to keep the log sources confidential.
+    :param path: csv file with the label code in the first column and its name in the second one.
+    :return: dict of label names by code, empty when the file does not exist.
+    """
+    if not os.path.exists(path):
+        return {}
+    return _read_labels_translation(path, os.stat(path).st_mtime_ns)
+
+
+# ------------------------------------------------------------------------------
+def decode_labels(trello_board, labels_translation=LABELS_TRANSLATION_PATH):
+    """Decode the label codes of the older boards into the columns they stand for.
+
+    Labels repeat a lot so only their distinct values are tokenized, by a single regex routing every code to
+    the column of its prefix in LABEL_COLUMNS, the first code of a prefix wins. The codes are translated
+    on the categories of the decoded columns, which are the only ones translated. Custom fields of the
+    newer boards take precedence, the decoded labels only fill their missing values.
+    :param trello_board: Trello board with the LABELS column.
+    :param labels_translation: path of the labels translation csv file, untranslated codes are kept.
+    :return: Trello board with the LABEL_COLUMNS columns instead of LABELS.
+    """
+    label_codes, labels = pd.factorize(trello_board.pop("LABELS"))
+    tokens = pd.Series(labels, dtype=object).str.extractall(LABEL_PATTERN).dropna()
+    tokens = tokens.droplevel("match").set_index("prefix", append=True)["code"]
+    decoded = tokens[~tokens.index.duplicated()].unstack("prefix")
+    decoded = decoded.reindex(index=range(len(labels)), columns=list(LABEL_COLUMNS))
+
+    translation = read_labels_translation(labels_translation) if labels_translation else {}
+    for prefix, column in LABEL_COLUMNS.items():
+        codes, categories = pd.factorize(decoded[prefix])
+        # Two codes can have the same name
+        name_codes, names = pd.factorize(
+            pd.Index([translation.get(code, code) for code in categories], dtype=object)
+        )
+        # Missing labels and labels without a code of that prefix have the code -1
+        values = pd.Series(
+            pd.Categorical.from_codes(
+                np.append(np.append(name_codes, -1)[codes], -1)[label_codes], categories=names
+            ),
+            index=trello_board.index,
+        )
+        if column in trello_board:
+            values = trello_board[column].astype(object).fillna(values.astype(object))
+        trello_board[column] = values
+    print_status("Decoded the labels.")
+    return trello_board
+
+
+# ------------------------------------------------------------------------------
+class ChartExporter:
+    """Export the plotly charts of a run through a single kaleido process kept warm for the whole run.
+
+    The generators queue their figures and flush renders all of them in one batch. The html format is
+    written by plotly itself and never starts kaleido.
+    """
+
+    def __init__(self, chart_format=CHART_FORMAT):
+        self.chart_format = chart_format
+        self._queue = []
+        self._lock = threading.Lock()
+
+    def render(self, fig, chart_format=None):
+        """Render a figure to bytes in chart_format, the exporter format by default."""
+        chart_format = chart_format or self.chart_format
+        if chart_format == "html":
+            return fig.to_html(include_plotlyjs="cdn", full_html=True).encode("utf-8")
+        import plotly.io as pio
+
+        return pio.to_image(fig, format=chart_format, engine="kaleido")
+
+    def warm_up(self):
+        """Start kaleido and Chromium in the background so the first chart does not pay for it."""
+        if self.chart_format == "html":
+            return
+        import plotly.graph_objects as go
+
+        threading.Thread(
+            target=self.render, args=(go.Figure(),), daemon=True
+        ).start()
+
+    def queue(self, fig, path):
+        """Queue a figure to be written to path, the extension is added from the chart format."""
+        path = "{}.{}".format(path, self.chart_format)
+        with self._lock:
+            self._queue.append((fig, path))
+        record_artifact(path)
+
+    def take(self):
+        """Remove the queued figures and return them as (figure, path) pairs, for extend in another process."""
+        with self._lock:
+            queue, self._queue = self._queue, []
+        return queue
+
+    def extend(self, queue):
+        """Queue the (figure, path) pairs taken from the exporter of another process."""
+        with self._lock:
+            self._queue += queue
+
+    def flush(self):
+        """Render and write every queued figure.
+        :return: paths of the written charts.
+        """
+        queue = self.take()
+        for fig, path in queue:
+            with atomic_path(path) as temporary_path, open(temporary_path, "wb") as f:
+                f.write(self.render(fig))
+        if queue:
+            print_status("Exported {} charts.".format(len(queue)))
+        return [path for fig, path in queue]
+
+
+CHART_EXPORTER = ChartExporter()
+
+
+# ------------------------------------------------------------------------------
+def _cube_labels(codes, categories):
+    """Labels of the category codes of a field of the DailyCube, missing values are labelled NONE."""
+    # The code -1 picks the NONE appended to the categories
+    return np.append(np.asarray(categories, dtype=object), "NONE")[codes]
+
+
+# ------------------------------------------------------------------------------
+class DailyCube:
+    """Tickets of a board counted per day and combination of the CUBE_FIELDS, built once per board.
+
+    Only the combinations that occur are kept: the counts are a series indexed by the day and the category
+    code of every field, where missing values have the code -1, so the cube grows with the tickets of the
+    board instead of the product of the categories of its fields.
+    """
+
+    def __init__(self, trello_board, fields=CUBE_FIELDS):
+        self.fields = list(fields)
+        self.categories = {
+            field: trello_board[field].astype("category").cat.categories for field in self.fields
+        }
+        self.counts = self.count(trello_board)
+
+    def __len__(self):
+        return len(self.counts)
+
+    def count(self, trello_board):
+        """Count the tickets of a slice of the board per day and combination of category codes."""
+        keys = {
+            "TICKET_CREATION_TIMESTAMP": trello_board["TICKET_CREATION_TIMESTAMP"]
+            .to_numpy()
+            .astype("datetime64[D]")
+        }
+        for field in self.fields:
+            keys[field] = pd.Categorical(
+                trello_board[field], categories=self.categories[field]
+            ).codes
+        return pd.DataFrame(keys).groupby(list(keys), sort=True).size()
+
+    def window(self, trello_board):
+        """Counts of a report window, a slice of the board sorted by creation time.
+
+        The days inside the window are sliced out of the cube and only the tickets of the first and the last
+        day, which the window may cut, are counted again.
+        """
+        creation_timestamps = trello_board["TICKET_CREATION_TIMESTAMP"].to_numpy()
+        first_day = creation_timestamps[0].astype("datetime64[D]")
+        last_day = creation_timestamps[-1].astype("datetime64[D]")
+        if last_day - first_day < 2:
+            return self.count(trello_board)
+        first_day_end, last_day_start = np.searchsorted(
+            creation_timestamps,
+            np.array([first_day + 1, last_day], dtype="datetime64[D]").astype(creation_timestamps.dtype),
+        )
+        edges = np.r_[0:first_day_end, last_day_start : len(trello_board)]
+        return pd.concat(
+            [
+                self.count(trello_board.iloc[edges]),
+                self.counts.loc[pd.Timestamp(first_day + 1) : pd.Timestamp(last_day - 1)],
+            ]
+        )
+
+# ------------------------------------------------------------------------------
+def build_daily_cube(trello_board):
+    """Daily cube of the CUBE_FIELDS of a whole board, shared by all its report windows."""
+    return DailyCube(trello_board)
+
+
+# ------------------------------------------------------------------------------
+class ReportContext:
+    """Aggregates of a report window shared by every generator.
+
+    They are computed once per window: the bounds of the creation timestamps, the DailyCube counts of the
+    CUBE_FIELDS, the daily counts and the counts of every field in COUNTED_FIELDS summed from them, the daily
+    pivot of the TREND_FIELDS on first use and, once offset_business_hours ran, the SLA statistics per
+    priority. With the DailyCube of the whole board, only the tickets of the first and last day are counted.
+    """
+
+    def __init__(self, trello_board, daily_cube=None):
+        creation_timestamps = trello_board["TICKET_CREATION_TIMESTAMP"]
+        self.start_timestamp = creation_timestamps.min()
+        self.end_timestamp = creation_timestamps.max()
+        self.file_prefix = "[{}-{}]".format(
+            self.start_timestamp.strftime("%d%b%y").upper(),
+            self.end_timestamp.strftime("%d%b%y").upper(),
+        )
+
+        # The board is sorted by creation time, the reports list the tickets by number, empty ones last
+        self.ticket_order = (
+            trello_board["T#"]
+            .reset_index(drop=True)
+            .sort_values(kind="stable", na_position="last")
+            .index.to_numpy()
+        )
+
+        if daily_cube is None:
+            daily_cube = DailyCube(trello_board)
+            cube_counts = daily_cube.counts
+        else:
+            cube_counts = daily_cube.window(trello_board)
+        self.cube_counts = cube_counts
+        self.cube_categories = daily_cube.categories
+
+        daily_counts = cube_counts.groupby(level="TICKET_CREATION_TIMESTAMP").sum()
+        # Days without tickets are plotted as gaps of the trendline
+        self.daily_counts = daily_counts[daily_counts > 0]
+        self.no_days = len(self.daily_counts)
+
+        self.field_counts = {}
+        for field in COUNTED_FIELDS:
+            categories = daily_cube.categories[field]
+            # Missing values have the code -1 and are left out, like value_counts does
+            field_count = pd.Series(
+                np.bincount(
+                    cube_counts.index.get_level_values(field) + 1,
+                    weights=cube_counts.to_numpy(),
+                    minlength=len(categories) + 1,
+                )[1:].astype(np.int64),
+                index=categories,
+            )
+            # Sorted like value_counts sorts the count of every category, ties included
+            field_count = field_count.reindex(
+                trello_board[field].astype("category").cat.categories, fill_value=0
+            ).sort_values(ascending=False)
+            self.field_counts[field] = field_count[field_count > 0]
+
+        self.sla_summary = None
+        if set(SLA_COLUMNS) <= set(trello_board.columns):
+            self.sla_summary = self._summarise_slas(trello_board)
+
+    @functools.cached_property
+    def daily_pivot(self):
+        """Tickets per day, from the first to the last day of the window, and combination of TREND_FIELDS."""
+        trend_counts = self.cube_counts.groupby(level=["TICKET_CREATION_TIMESTAMP"] + TREND_FIELDS).sum()
+        daily_pivot = trend_counts.unstack(TREND_FIELDS, fill_value=0)
+        daily_pivot.columns = pd.MultiIndex.from_arrays(
+            [
+                _cube_labels(daily_pivot.columns.get_level_values(field), self.cube_categories[field])
+                for field in TREND_FIELDS
+            ],
+            names=TREND_FIELDS,
+        )
+        return (
+            daily_pivot.T.groupby(level=TREND_FIELDS, sort=True)
+            .sum()
+            .T.reindex(
+                pd.date_range(
+                    daily_pivot.index.min(),
+                    daily_pivot.index.max(),
+                    freq="D",
+                    name="TICKET_CREATION_TIMESTAMP",
+                ),
+                fill_value=0,
+            )
+        )
+
+    @staticmethod
+    def _summarise_slas(trello_board):
+        """Ticket count and mean, median and 90th percentile of the SLAs, per priority and overall."""
+        slas = trello_board[list(SLA_COLUMNS)].rename(columns=SLA_COLUMNS)
+        # Grouped on the category codes, with the categories in the order of the object values
+        priorities = trello_board["PRIORITY"].astype("category")
+        priorities = priorities.cat.set_categories(
+            sorted(set(priorities.cat.categories) | {"NONE"}, key=str)
+        ).fillna("NONE")
+        statistics = []
+        for grouped in (
+            slas.groupby(priorities, observed=True, sort=True),
+            slas.groupby(np.zeros(len(slas))),
+        ):
+            statistic = pd.concat(
+                {
+                    "MEAN": grouped.mean(),
+                    "MEDIAN": grouped.median(),
+                    "P90": grouped.quantile(0.9),
+                },
+                axis=1,
+            )
+            statistic.columns = [
+                "BUSINESS_HOURS_TO_{}_{}".format(sla, name) for name, sla in statistic.columns
+            ]
+            statistic.insert(0, "TICKETS", grouped.size())
+            statistics.append(statistic.sort_index())
+        statistics[1].index = ["ALL"]
+        return pd.concat(statistics).rename_axis("PRIORITY").round(2).reset_index()
+
+    def file_name(self, name):
+        """Prefix a file name with the abbreviated dates of the window, e.g. [01JAN23-31JAN23]TRENDLINE.svg."""
+        return "{}{}".format(self.file_prefix, name)
+
+    def field_count_table(self, field):
+        """Counts and percentages of a field as written to its csv file and pie chart."""
+        field_count = self.field_counts[field]
+        field_count_table = field_count.rename_axis(field).reset_index(
+            name="{}_COUNT".format(field)
+        )
+        field_count_table.index.rename("NO.", inplace=True)
+        field_count_table.index += 1
+        field_count_table["{}_PCT".format(field)] = field_count.values / field_count.sum()
+        return field_count_table
+
+
+# ------------------------------------------------------------------------------
+def gen_field_counts(trello_board, output_dir=OUTPUT_DIR, context=None):
+    """Write the counts and percentages of every field in COUNTED_FIELDS as csv files."""
+    context = context or ReportContext(trello_board)
+    for field in COUNTED_FIELDS:
+        write_csv(
+            context.field_count_table(field),
+            os.path.join(output_dir, context.file_name("{}.csv".format(field))),
+            sep=",",
+        )
+    print_status("Field counts exported.")
+
+
+# ------------------------------------------------------------------------------
+def gen_barplot(trello_board, output_dir=OUTPUT_DIR, context=None):
+    import plotly.graph_objects as go
+
+    context = context or ReportContext(trello_board)
+    required_fields = ["LOG_SOURCE", "RESOLUTION_CODE"]
+
+    for required_field in required_fields:
+        required_field_count = context.field_count_table(required_field)
+        fig = go.Figure(
+            data=[
+                go.Pie(
+                    labels=required_field_count[required_field],
+                    values=required_field_count["{}_PCT".format(required_field)],
+                    textinfo="label+percent",
+                    insidetextorientation="radial",
+                    showlegend=False,
+                    marker=dict(colors=COLORS, line=dict(color="#000000", width=2)),
+                )
+            ]
+        )
+        fig.update_layout(
+            title="Security Investigation Tickets distributed by<br> {}".format(
+                required_field
+            )
+        )
+        # fig.layout.images = [dict( source=logo_path, xref='paper', yref='paper', x=0.97,  y=0.97, sizex=0.50,
+        # sizey=0.50, xanchor='center', yanchor='bottom')]
+        CHART_EXPORTER.queue(
+            fig,
+            os.path.join(output_dir, context.file_name("{}_COUNT".format(required_field))),
+        )
+        print_status("Barplot chart generated.")
+
+
+# ------------------------------------------------------------------------------
+def gen_trendline(trello_board, output_dir=OUTPUT_DIR, context=None):
+    import plotly.graph_objects as go
+
+    context = context or ReportContext(trello_board)
+    tickets_count = context.daily_counts.reset_index(name="COUNT")
+
+    # Plot ---------------------------------------------------------------------------------
+
+    my_layout = go.Layout(font=dict(color="#7f7f7f"))
+    my_data = go.Scatter(
+        x=tickets_count["TICKET_CREATION_TIMESTAMP"],
         y=tickets_count["COUNT"],
         mode="lines+markers+text",
     )
@@ -499,7 +1913,7 @@ def gen_trendline(trello_board):
         go.Scatter(
             x=[
                 tickets_count["TICKET_CREATION_TIMESTAMP"].max()
-                - pd.Timedelta(days=trello_board.no_days) / 2.0
+                - pd.Timedelta(days=context.no_days) / 2.0
             ],
             y=[tickets_count["COUNT"].mean()],
             mode="markers+text",
@@ -532,92 +1946,1341 @@ def gen_trendline(trello_board):
     #     xanchor='center',
     #     yanchor='bottom',
     #     )]
-    report_start_date_abbreviated = (
-        trello_board["TICKET_CREATION_TIMESTAMP"].min().strftime("%d%b%y")
-    ).upper()
-    report_end_date_abbreviated = (
-        trello_board["TICKET_CREATION_TIMESTAMP"].max().strftime("%d%b%y")
-    ).upper()
-    fig.write_image(
-        "./OUTPUT/[{}-{}]TRENDLINE.svg".format(
-            report_start_date_abbreviated, report_end_date_abbreviated
+    CHART_EXPORTER.queue(fig, os.path.join(output_dir, context.file_name("TRENDLINE")))
+    print_status("Trendline chart generated.")
+
+
+# ------------------------------------------------------------------------------
+def gen_trends(trello_board, output_dir=OUTPUT_DIR, context=None):
+    """Write the daily, weekly and monthly trends of the tickets and the stacked trends of the TREND_FIELDS.
+
+    Everything is derived from the daily pivot of the context: the daily counts with their cumulative sum,
+    rolling mean, rolling median and 90th percentile and the z-score of every day against the
+    TREND_PERCENTILE_DAYS before it, the TREND_ROLLUPS and the counts of every field value per day.
+    """
+    import plotly.graph_objects as go
+
+    context = context or ReportContext(trello_board)
+    daily_pivot = context.daily_pivot
+    tickets = daily_pivot.sum(axis=1)
+
+    baseline = tickets.shift(1).rolling(TREND_PERCENTILE_DAYS, min_periods=TREND_ROLLING_DAYS)
+    zscores = ((tickets - baseline.mean()) / baseline.std()).replace([np.inf, -np.inf], np.nan)
+    daily_trends = pd.DataFrame(
+        {
+            "TICKETS": tickets,
+            "CUMULATIVE": tickets.cumsum(),
+            "ROLLING_MEAN": tickets.rolling(TREND_ROLLING_DAYS, min_periods=1).mean(),
+            "ROLLING_MEDIAN": tickets.rolling(TREND_PERCENTILE_DAYS, min_periods=1).median(),
+            "ROLLING_P90": tickets.rolling(TREND_PERCENTILE_DAYS, min_periods=1).quantile(0.9),
+            "ZSCORE": zscores,
+            "ANOMALY": zscores.abs() >= ANOMALY_ZSCORE,
+        }
+    ).round(2)
+    write_csv(daily_trends, os.path.join(output_dir, context.file_name("TRENDS_DAILY.csv")))
+    for rollup, frequency in TREND_ROLLUPS.items():
+        periods = tickets.resample(frequency)
+        write_csv(
+            pd.DataFrame(
+                {
+                    "TICKETS": periods.sum(),
+                    "MEAN_PER_DAY": periods.mean(),
+                    "MEDIAN_PER_DAY": periods.median(),
+                    "P90_PER_DAY": periods.quantile(0.9),
+                }
+            ).round(2),
+            os.path.join(output_dir, context.file_name("TRENDS_{}.csv".format(rollup))),
         )
+
+    fig = go.Figure(
+        data=[
+            go.Scatter(x=tickets.index, y=tickets, mode="lines", name="Tickets", line=dict(color=COLORS[0])),
+            go.Scatter(
+                x=tickets.index,
+                y=daily_trends["ROLLING_MEAN"],
+                mode="lines",
+                name="{}-day mean".format(TREND_ROLLING_DAYS),
+                line=dict(color=COLORS[1]),
+            ),
+            go.Scatter(
+                x=tickets.index,
+                y=daily_trends["ROLLING_P90"],
+                mode="lines",
+                name="{}-day 90th percentile".format(TREND_PERCENTILE_DAYS),
+                line=dict(color=COLORS[2], dash="dash"),
+            ),
+            go.Scatter(
+                x=tickets.index[daily_trends["ANOMALY"]],
+                y=tickets[daily_trends["ANOMALY"]],
+                mode="markers",
+                name="Anomalous days",
+                marker=dict(color=COLORS[3], size=10, line=dict(color="#000000", width=1)),
+            ),
+        ]
+    )
+    fig.update_layout(
+        title_text="VSOC tickets per day<br>Anomalous days are more than {} standard deviations away from the "
+        "previous {} days".format(ANOMALY_ZSCORE, TREND_PERCENTILE_DAYS),
+        font=dict(color="#7f7f7f"),
     )
-    print(colored("[SUCCESS]", "green"), end=".....................")
-    print("Trendline chart generated and exported.")
+    CHART_EXPORTER.queue(fig, os.path.join(output_dir, context.file_name("TRENDS")))
+
+    for field in TREND_FIELDS:
+        field_trend = daily_pivot.T.groupby(level=field, sort=True).sum().T
+        write_csv(field_trend, os.path.join(output_dir, context.file_name("{}_TREND.csv".format(field))))
+        if len(field_trend) > TREND_DAILY_MAX_DAYS:
+            field_trend = field_trend.resample(TREND_ROLLUPS["WEEKLY"]).sum()
+        fig = go.Figure(
+            data=[
+                go.Bar(x=field_trend.index, y=field_trend[value], name=str(value))
+                for value in field_trend.columns
+            ]
+        )
+        fig.update_layout(
+            barmode="stack",
+            title_text="VSOC tickets per {} by {}".format(
+                "week" if len(field_trend) < len(tickets) else "day", field
+            ),
+            font=dict(color="#7f7f7f"),
+        )
+        CHART_EXPORTER.queue(
+            fig, os.path.join(output_dir, context.file_name("{}_TREND".format(field)))
+        )
+    print_status(
+        "Trends generated, {} anomalous days.".format(int(daily_trends["ANOMALY"].sum()))
+    )
+
+
+# ------------------------------------------------------------------------------
+def write_excel_sheet(workbook, title, frame, columns=None, order=None, index_label="NO."):
+    """Stream a dataframe into a new sheet of a write-only workbook, EXCEL_CHUNK_SIZE rows at a time.
+
+    Rows are numbered from 1 in the first column. Only a chunk of the selected columns is ever copied, so
+    the memory used by the writer does not grow with the number of tickets.
+    :param workbook: openpyxl workbook opened with write_only=True.
+    :param title: title of the sheet.
+    :param frame: dataframe to write.
+    :param columns: columns to write, all of them by default.
+    :param order: positions of the rows in the order they are written, the frame order by default.
+    :param index_label: header of the row numbers column.
+    """
+    columns = list(frame.columns) if columns is None else columns
+    worksheet = workbook.create_sheet(title)
+    worksheet.append([index_label] + [str(column) for column in columns])
+    for chunk_start in range(0, len(frame), EXCEL_CHUNK_SIZE):
+        if order is None:
+            chunk = frame.iloc[chunk_start : chunk_start + EXCEL_CHUNK_SIZE][columns]
+        else:
+            chunk = frame.iloc[order[chunk_start : chunk_start + EXCEL_CHUNK_SIZE]][columns]
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        for number, row in enumerate(
+            chunk.itertuples(index=False, name=None), start=chunk_start + 1
+        ):
+            worksheet.append((number,) + row)
 
 
 # ------------------------------------------------------------------------------
-def gen_customer_report(trello_board):
+def gen_customer_report(trello_board, workbook, context=None):
+    context = context or ReportContext(trello_board)
     # Save a customer report
-    customer_report = trello_board[
-        [
-            "T#",
-            "TICKET_CREATION_TIMESTAMP",
-            "OFFENSE_ID",
-            "LOG_SOURCE",
-            "RESOLUTION_CODE",
-            "DESC",
-            "PRIORITY",
+    write_excel_sheet(
+        workbook,
+        "EXTERNAL_REPORT",
+        trello_board,
+        columns=[column for column in CUSTOMER_REPORT_COLUMNS if column in trello_board],
+        order=context.ticket_order,
+    )
+    print_status("External report generated.")
+
+
+# ------------------------------------------------------------------------------
+def gen_summary_table(trello_board, workbook, context=None):
+    context = context or ReportContext(trello_board)
+    # Generate a summary table of the main features
+    summary_table_count = (
+        context.field_counts["RESOLUTION_CODE"]
+        .sort_index()
+        .rename_axis("RESOLUTION_CODE")
+        .reset_index(name="COUNT")
+    )
+    write_excel_sheet(workbook, "SUMMARY_TABLE_COUNT", summary_table_count)
+    print_status("Sumamry table generated.")
+
+
+# ------------------------------------------------------------------------------
+def gen_workbook(trello_board, output_dir=OUTPUT_DIR, context=None):
+    """Write the internal report, the external report and the summary table as sheets of one workbook."""
+    from openpyxl import Workbook
+
+    context = context or ReportContext(trello_board)
+    workbook = Workbook(write_only=True)
+    write_excel_sheet(workbook, "INTERNAL_REPORT", trello_board, order=context.ticket_order)
+    print_status("Internal report generated.")
+    gen_customer_report(trello_board, workbook, context)
+    gen_summary_table(trello_board, workbook, context)
+    if context.sla_summary is not None:
+        write_excel_sheet(workbook, "SLA_SUMMARY", context.sla_summary)
+        print_status("SLA summary generated.")
+    with atomic_path(os.path.join(output_dir, context.file_name("REPORT.xlsx"))) as temporary_path:
+        workbook.save(temporary_path)
+    print_status("Reports workbook exported.")
+
+
+# ------------------------------------------------------------------------------
+def _html_head(title):
+    return (
+        '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>{}</title>\n'
+        "<style>{}</style>\n</head>\n<body>\n".format(html.escape(title), HTML_STYLE)
+    )
+
+
+# ------------------------------------------------------------------------------
+def write_html_table(path, title, frame, start=0, stop=None, navigation="", order=None):
+    """Write rows start to stop of a dataframe as a styled html page, HTML_CHUNK_SIZE rows at a time.
+
+    Rows are numbered from start + 1 in the first column and missing values are left empty. order gives
+    the positions of the rows in the order they are written, the frame order by default.
+    """
+    stop = len(frame) if stop is None else stop
+    header = "".join("<th>{}</th>".format(html.escape(str(column))) for column in frame.columns)
+    with atomic_path(path) as temporary_path, open(temporary_path, "w", encoding="utf-8") as f:
+        f.write("{}{}\n".format(_html_head(title), navigation))
+        f.write('<table class="dataframe">\n<thead><tr><th></th>{}</tr></thead>\n<tbody>\n'.format(header))
+        for chunk_start in range(start, stop, HTML_CHUNK_SIZE):
+            chunk_stop = min(chunk_start + HTML_CHUNK_SIZE, stop)
+            if order is None:
+                chunk = frame.iloc[chunk_start:chunk_stop]
+            else:
+                chunk = frame.iloc[order[chunk_start:chunk_stop]]
+            chunk = chunk.astype(object).where(chunk.notna(), "")
+            f.write(
+                "".join(
+                    "<tr><th>{}</th>{}</tr>\n".format(
+                        number,
+                        "".join("<td>{}</td>".format(html.escape(str(value))) for value in row),
+                    )
+                    for number, row in enumerate(
+                        chunk.itertuples(index=False, name=None), start=chunk_start + 1
+                    )
+                )
+            )
+        f.write("</tbody>\n</table>\n{}\n</body>\n</html>\n".format(navigation))
+
+
+# ------------------------------------------------------------------------------
+def gen_internal_report(trello_board, output_dir=OUTPUT_DIR, context=None):
+    """Write the internal report as html, split in pages of HTML_ROWS_PER_PAGE rows behind an index page."""
+    context = context or ReportContext(trello_board)
+    file_name = context.file_name("SOC_REPORT.html")
+    if not HTML_ROWS_PER_PAGE or len(trello_board) <= HTML_ROWS_PER_PAGE:
+        write_html_table(
+            os.path.join(output_dir, file_name),
+            file_name,
+            trello_board,
+            order=context.ticket_order,
+        )
+        print_status("Internal report generated and exported.")
+        return
+
+    page_starts = range(0, len(trello_board), HTML_ROWS_PER_PAGE)
+    page_names = [
+        context.file_name("SOC_REPORT_{:03d}.html".format(page + 1))
+        for page in range(len(page_starts))
+    ]
+    for page, page_start in enumerate(page_starts):
+        links = ['<a href="{}">Index</a>'.format(html.escape(file_name))]
+        if page > 0:
+            links.insert(0, '<a href="{}">Previous</a>'.format(html.escape(page_names[page - 1])))
+        if page < len(page_names) - 1:
+            links.append('<a href="{}">Next</a>'.format(html.escape(page_names[page + 1])))
+        write_html_table(
+            os.path.join(output_dir, page_names[page]),
+            page_names[page],
+            trello_board,
+            page_start,
+            min(page_start + HTML_ROWS_PER_PAGE, len(trello_board)),
+            "<nav>{}</nav>".format(" | ".join(links)),
+            context.ticket_order,
+        )
+
+    with atomic_path(os.path.join(output_dir, file_name)) as temporary_path, open(
+        temporary_path, "w", encoding="utf-8"
+    ) as f:
+        f.write("{}<nav><ul>\n".format(_html_head(file_name)))
+        for page_name, page_start in zip(page_names, page_starts):
+            f.write(
+                '<li><a href="{}">Tickets {} to {}</a></li>\n'.format(
+                    html.escape(page_name),
+                    page_start + 1,
+                    min(page_start + HTML_ROWS_PER_PAGE, len(trello_board)),
+                )
+            )
+        f.write("</ul></nav>\n</body>\n</html>\n")
+    print_status(
+        "Internal report generated and exported in {} pages.".format(len(page_names))
+    )
+
+
+# ------------------------------------------------------------------------------
+REPORT_STAGES = {
+    "internal": gen_internal_report,
+    "workbook": gen_workbook,
+    "counts": gen_field_counts,
+    "barplot": gen_barplot,
+    "trendline": gen_trendline,
+    "trends": gen_trends,
+}
+# Report stages that queue charts for the CHART_EXPORTER
+CHART_STAGES = {"barplot", "trendline", "trends"}
+# Every stage measure_stage records, in the order of a run: the board, its daily cube, then every window
+MEASURED_STAGES = [
+    "load",
+    "validate",
+    "store",
+    "filter",
+    "business_hours",
+    "index",
+    "cube",
+    "timestamps",
+    *REPORT_STAGES,
+    "charts",
+]
+
+
+# ------------------------------------------------------------------------------
+def _run_stage(stage, trello_board, output_dir, context, flush_charts=False, take_charts=False):
+    """Run a single report stage and return its measure_stage record instead of raising its error.
+
+    The record also lists the artifacts the stage wrote, or queued for the CHART_EXPORTER. The "charts"
+    stage only exports the charts queued by the other stages. With take_charts, the figures queued by the
+    stage are returned in the "charts" entry of the record, for the exporter of the parent process.
+    """
+    try:
+        with measure_stage(
+            stage, len(trello_board), context.file_prefix, output_dir
+        ) as record, collect_artifacts() as artifacts:
+            record["artifacts"] = artifacts
+            if stage in REPORT_STAGES:
+                REPORT_STAGES[stage](trello_board, output_dir, context)
+            if flush_charts:
+                CHART_EXPORTER.flush()
+    except Exception:
+        pass  # the traceback is in the record
+    if take_charts:
+        record["charts"] = CHART_EXPORTER.take()
+    return record
+
+
+# ------------------------------------------------------------------------------
+def gen_reports(
+    trello_board,
+    output_dir=OUTPUT_DIR,
+    stages=None,
+    jobs=None,
+    pool="thread",
+    daily_cube=None,
+    output_manager=None,
+    executor=None,
+):
+    """Generate the reports and charts of a single report window concurrently.
+
+    The stages only read the board. Threads share it without copying and overlap the kaleido renderer
+    with the Excel writers, processes also run the openpyxl writers in parallel but pickle the board.
+    Charts queued by the stages, or sent back by the worker processes, are exported together by the
+    kaleido process of this one once every stage is done, the "charts" result.
+    :param trello_board: Trello board of the report window.
+    :param output_dir: directory the reports are written to.
+    :param stages: names of the REPORT_STAGES to run, all of them by default.
+    :param jobs: number of stages running at the same time, all of them by default.
+    :param pool: "thread" or "process".
+    :param daily_cube: DailyCube of the whole board, see build_daily_cube.
+    :param output_manager: OutputManager of output_dir, the stages it finds unchanged are skipped and the
+        records of the others get the fingerprint of their input.
+    :param executor: stage_executor of pool shared by the windows of a run, one is started for this window
+        when it is None.
+    :return: list of measure_stage records, their error is None for the stages that succeeded.
+    """
+    stages = list(REPORT_STAGES if stages is None else stages)
+    context = ReportContext(trello_board, daily_cube)
+    fingerprints = {}
+    results = []
+    if output_manager is not None:
+        window_digest = board_digest(trello_board)
+        fingerprints = {stage: output_manager.fingerprint(window_digest, stage) for stage in stages}
+        for stage in list(stages):
+            if output_manager.is_unchanged(context.file_prefix, stage, fingerprints[stage]):
+                with measure_stage(stage, len(trello_board), context.file_prefix, output_dir) as record:
+                    record["skipped"] = True
+                results.append(record)
+                stages.remove(stage)
+        if results:
+            print_status(
+                "Skipped the unchanged {} of {}.".format(
+                    ", ".join(record["stage"] for record in results), context.file_prefix
+                )
+            )
+        if not stages:
+            return results
+    with contextlib.nullcontext(executor) if executor else stage_executor(
+        pool, jobs or len(stages)
+    ) as executor:
+        futures = [
+            executor.submit(
+                _run_stage, stage, trello_board, output_dir, context, take_charts=pool == "process"
+            )
+            for stage in stages
+        ]
+        results += [future.result() for future in futures]
+    for record in results:
+        record["fingerprint"] = fingerprints.get(record["stage"])
+        CHART_EXPORTER.extend(record.pop("charts", []))
+
+    # Charts are rendered in one batch by the warm kaleido process
+    if CHART_STAGES & set(stages):
+        results.append(_run_stage("charts", trello_board, output_dir, context, flush_charts=True))
+
+    for record in results:
+        if record["error"]:
+            print_status(
+                "The {} stage failed:\n{}".format(record["stage"], record["error"]), "[FAILURE]", "red"
+            )
+    return results
+
+
+# ------------------------------------------------------------------------------
+def stage_executor(pool="thread", jobs=None):
+    """Pool the report stages or the report windows run in, "thread" or "process".
+
+    Worker processes get the options of this one. Those running report windows start their own kaleido
+    process on their first chart instead of sharing the pipes of ours, those running report stages send
+    their charts back to be rendered by ours.
+    """
+    if pool != "process":
+        return ThreadPoolExecutor(max_workers=jobs)
+    return ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_worker,
+        initargs=(CHART_EXPORTER.chart_format, HTML_ROWS_PER_PAGE, PROFILE_STAGE, PROFILER),
+    )
+
+
+# ------------------------------------------------------------------------------
+def _init_worker(chart_format, html_rows_per_page, profile_stage=None, profiler=PROFILER):
+    """Set up the options of a worker process, its kaleido process starts with its first chart."""
+    global HTML_ROWS_PER_PAGE, PROFILE_STAGE, PROFILER
+    HTML_ROWS_PER_PAGE = html_rows_per_page
+    PROFILE_STAGE = profile_stage
+    PROFILER = profiler
+    CHART_EXPORTER.chart_format = chart_format
+
+
+# ------------------------------------------------------------------------------
+def prepare_board(
+    path,
+    calendar=None,
+    use_cache=True,
+    invalidate_cache=False,
+    ticket_store=None,
+    run_log=RUN_LOG,
+    board=None,
+    output_dir=OUTPUT_DIR,
+    labels_translation=None,
+    validate=True,
+    earliest_date=EARLIEST_DATE,
+):
+    """Load a Trello board and prepare it for the report windows, every step is measured in run_log.
+
+    :param path: path of the exported Trello board csv or json file.
+    :param calendar: BusinessCalendar the SLAs are measured in.
+    :param use_cache: read and write the snapshot cache.
+    :param invalidate_cache: parse the export again even if it is cached.
+    :param ticket_store: path of the ticket store the export is upserted into and read back from, the
+        export is used as is when it is None.
+    :param run_log: RunLog the records of the steps are kept in.
+    :param board: name of the board in the records of a multi-board run, e.g. the customer.
+    :param output_dir: directory the profile of the PROFILE_STAGE and the quarantined tickets are written to.
+    :param labels_translation: path of the labels translation csv file, the labels are decoded when it is
+        given.
+    :param validate: quarantine the tickets failing validate_tickets, before the upsert with a ticket store.
+    :param earliest_date: earliest valid date of the timestamps, see validate_tickets.
+    :return: Trello board as returned by index_trello_board.
+    """
+    if ticket_store:
+        # The store keeps every card, so a card reopened or moved to another category in a later export
+        # replaces its resolved copy and is filtered out below. An export already upserted is not loaded.
+        export, export_key, validation, quarantined = load_unstored_export(
+            path,
+            ticket_store,
+            validate,
+            earliest_date,
+            run_log,
+            board,
+            output_dir,
+            use_cache,
+            invalidate_cache,
+            labels_translation,
+        )
+        with run_log.stage(
+            "store", None if export is None else len(export), output_dir=output_dir, board=board
+        ) as record:
+            if export is not None:
+                update_ticket_store(export, ticket_store, export_key, quarantined, validation)
+            trello_board = read_ticket_store(ticket_store)
+            record["rows_out"] = len(trello_board)
+    else:
+        with run_log.stage("load", output_dir=output_dir, board=board) as record:
+            trello_board = load_trello_board(
+                path,
+                use_cache=use_cache,
+                invalidate_cache=invalidate_cache,
+                labels_translation=labels_translation,
+            )
+            record["rows_out"] = len(trello_board)
+    with run_log.stage("filter", len(trello_board), output_dir=output_dir, board=board) as record:
+        trello_board = filter_tickets(trello_board)
+        record["rows_out"] = len(trello_board)
+    if validate and not ticket_store:
+        with run_log.stage("validate", len(trello_board), output_dir=output_dir, board=board) as record:
+            trello_board, record["checks"] = validate_tickets(trello_board, output_dir, earliest_date)
+            record["rows_out"] = len(trello_board)
+    if "TICKET_RESPONSE_TIMESTAMP" in trello_board:
+        with run_log.stage(
+            "business_hours", len(trello_board), output_dir=output_dir, board=board
+        ) as record:
+            trello_board = offset_business_hours(trello_board, calendar)
+            record["rows_out"] = len(trello_board)
+    with run_log.stage("index", len(trello_board), output_dir=output_dir, board=board) as record:
+        trello_board = index_trello_board(trello_board)
+        record["rows_out"] = len(trello_board)
+    return trello_board
+
+
+# ------------------------------------------------------------------------------
+def _prepare_board_worker(path, *args, **kwargs):
+    """prepare_board in a worker process, its records are sent back since the worker has its own RUN_LOG.
+    :return: (Trello board, records) tuple, the board is None when a step failed.
+    """
+    run_log = RunLog()
+    try:
+        trello_board = prepare_board(path, *args, run_log=run_log, **kwargs)
+    except Exception:
+        trello_board = None  # the traceback is in the records
+    return trello_board, run_log.records
+
+
+# ------------------------------------------------------------------------------
+def prepare_boards(
+    boards,
+    calendar=None,
+    use_cache=True,
+    invalidate_cache=False,
+    incremental=False,
+    labels_translation=None,
+    validate=True,
+    earliest_date=EARLIEST_DATE,
+):
+    """Load and prepare several Trello boards in parallel worker processes.
+
+    The report windows of every board are then generated by this process, so all of them share its chart
+    exporter and its kaleido process. A board that fails to load is reported and left out.
+    :param boards: list of (path, customer, output directory) tuples.
+    :param incremental: upsert every export into a ticket store of its own customer.
+    :param labels_translation: path of the labels translation csv file, the labels are decoded when it is
+        given.
+    :param validate: quarantine the tickets failing validate_tickets, in the output directory of every board.
+    :param earliest_date: earliest valid date of the timestamps, see validate_tickets.
+    :return: list of Trello boards as returned by index_trello_board, None for the boards that failed.
+    """
+    with ProcessPoolExecutor(max_workers=min(len(boards), os.cpu_count() or 1)) as executor:
+        futures = [
+            executor.submit(
+                _prepare_board_worker,
+                path,
+                calendar,
+                use_cache,
+                invalidate_cache,
+                ticket_store_path(customer) if incremental else None,
+                board=customer,
+                output_dir=output_dir,
+                labels_translation=labels_translation,
+                validate=validate,
+                earliest_date=earliest_date,
+            )
+            for path, customer, output_dir in boards
         ]
+        trello_boards = []
+        for future in futures:
+            trello_board, records = future.result()
+            RUN_LOG.records += records
+            for record in records:
+                if record["error"]:
+                    print_status(
+                        "The {} board failed to load:\n{}".format(record["board"], record["error"]),
+                        "[FAILURE]",
+                        "red",
+                    )
+            trello_boards.append(trello_board)
+    return trello_boards
+
+
+# ------------------------------------------------------------------------------
+def window_prefix(start_timestamp, end_timestamp):
+    """Abbreviated dates of a requested report window, e.g. [01JAN23-01FEB23]."""
+    return "[{}-{}]".format(
+        pd.Timestamp(start_timestamp).strftime("%d%b%y").upper(),
+        pd.Timestamp(end_timestamp).strftime("%d%b%y").upper(),
+    )
+
+
+# ------------------------------------------------------------------------------
+def gen_report_windows(
+    trello_board,
+    report_windows,
+    output_dir=OUTPUT_DIR,
+    jobs=1,
+    stages=None,
+    stage_jobs=None,
+    stage_pool="thread",
+    output_manager=None,
+):
+    """Generate the reports of every window from the same filtered Trello board.
+
+    :param trello_board: Trello board as returned by index_trello_board.
+    :param report_windows: list of (start_timestamp, end_timestamp) tuples.
+    :param output_dir: directory the reports are written to.
+    :param jobs: number of worker processes, windows are generated one after the other when it is 1.
+    :param stages: names of the REPORT_STAGES to run, all of them by default.
+    :param stage_jobs: number of stages of a window running at the same time.
+    :param stage_pool: "thread" or "process" pool for the stages of a window.
+    :param output_manager: OutputManager of output_dir, the unchanged reports are skipped and the manifest
+        is updated with the others.
+    :return: list of measure_stage records of every window.
+    """
+    window_boards = []
+    results = []
+    # The counts of every window are summed from the daily cube of the board
+    with measure_stage("cube", len(trello_board), output_dir=output_dir) as record:
+        daily_cube = build_daily_cube(trello_board) if len(trello_board) else None
+        record["rows_out"] = 0 if daily_cube is None else len(daily_cube)
+    results.append(record)
+    for start_timestamp, end_timestamp in report_windows:
+        window = window_prefix(start_timestamp, end_timestamp)
+        with measure_stage("timestamps", len(trello_board), window, output_dir) as record:
+            window_board = process_timestamps(trello_board, start_timestamp, end_timestamp)
+            record["rows_out"] = len(window_board)
+        results.append(record)
+        if window_board.empty:
+            print_status(
+                "No tickets between {} and {}, skipped.".format(start_timestamp, end_timestamp),
+                "[WARNING]",
+                "yellow",
+            )
+            continue
+        window_boards.append(window_board)
+
+    if jobs <= 1:
+        # The stages of every window run in the same pool, so its workers and their kaleido start once
+        with stage_executor(stage_pool, stage_jobs or len(stages or REPORT_STAGES)) as executor:
+            for window_board in window_boards:
+                results += gen_reports(
+                    window_board,
+                    output_dir,
+                    stages,
+                    stage_jobs,
+                    stage_pool,
+                    daily_cube,
+                    output_manager,
+                    executor,
+                )
+    else:
+        with stage_executor("process", jobs) as executor:
+            futures = [
+                executor.submit(
+                    gen_reports,
+                    window_board,
+                    output_dir,
+                    stages,
+                    stage_jobs,
+                    stage_pool,
+                    daily_cube,
+                    output_manager,
+                )
+                for window_board in window_boards
+            ]
+            for future in futures:
+                results += future.result()
+    # Only this process writes the manifest, the worker processes return the artifacts of their stages
+    if output_manager is not None:
+        output_manager.update(results)
+    return results
+
+
+# ------------------------------------------------------------------------------
+def gen_cross_customer_summary(customer_boards, report_windows, output_dir=OUTPUT_DIR):
+    """Write the tickets, resolution codes and SLAs of every customer side by side, one csv file per window.
+
+    The last row, ALL, is computed over the tickets of every customer.
+    :param customer_boards: dict of customer to Trello board as returned by index_trello_board.
+    :param report_windows: list of (start_timestamp, end_timestamp) tuples.
+    :param output_dir: directory the summaries are written to.
+    """
+    daily_cubes = {
+        customer: build_daily_cube(trello_board)
+        for customer, trello_board in customer_boards.items()
+        if len(trello_board)
+    }
+    for start_timestamp, end_timestamp in report_windows:
+        window_boards = {
+            customer: process_timestamps(trello_board, start_timestamp, end_timestamp)
+            for customer, trello_board in customer_boards.items()
+        }
+        window_boards = {
+            customer: window_board
+            for customer, window_board in window_boards.items()
+            if not window_board.empty
+        }
+        if not window_boards:
+            continue
+        window_boards["ALL"] = pd.concat(window_boards.values())
+        resolution_codes = {}
+        slas = {}
+        for customer, window_board in window_boards.items():
+            context = ReportContext(window_board, daily_cubes.get(customer))
+            resolution_codes[customer] = context.field_counts["RESOLUTION_CODE"]
+            if context.sla_summary is not None:
+                slas[customer] = context.sla_summary.set_index("PRIORITY").loc["ALL"].drop("TICKETS")
+        # Resolution codes missing from a customer are counted as 0
+        resolution_codes = pd.DataFrame(resolution_codes).T.fillna(0).astype(int)
+        resolution_codes = resolution_codes[sorted(resolution_codes.columns, key=str)]
+        customer_summary = pd.concat(
+            [
+                pd.Series(
+                    {customer: len(window_board) for customer, window_board in window_boards.items()},
+                    name="TICKETS",
+                ),
+                resolution_codes,
+                pd.DataFrame(slas).T,
+            ],
+            axis=1,
+        )
+        customer_summary = customer_summary.rename_axis("CUSTOMER").reset_index()
+        customer_summary.index.rename("NO.", inplace=True)
+        customer_summary.index += 1
+        write_csv(
+            customer_summary,
+            os.path.join(
+                output_dir,
+                "{}CUSTOMER_SUMMARY.csv".format(window_prefix(start_timestamp, end_timestamp)),
+            ),
+        )
+    print_status("Cross-customer summary generated.")
+
+
+# ------------------------------------------------------------------------------
+class ReportService:
+    """Trello board kept in memory between the requests of the report service.
+
+    Trello exports dropped in the watched directory are upserted into its ticket store and the board is
+    reloaded from it, every reload is a new board version. Artifacts are rendered one at a time by the
+    report stages and kept in a least recently used cache keyed by (board version, window, report type).
+    """
+
+    def __init__(
+        self,
+        watch_dir=INPUT_DIR,
+        calendar=None,
+        cache_entries=SERVICE_CACHE_ENTRIES,
+        labels_translation=None,
+        earliest_date=EARLIEST_DATE,
+    ):
+        self.watch_dir = watch_dir
+        self.calendar = calendar
+        self.cache_entries = cache_entries
+        self.labels_translation = labels_translation
+        self.earliest_date = earliest_date
+        # Every export of the watched directory is a version of the same board
+        self.ticket_store = ticket_store_path(os.path.basename(os.path.normpath(watch_dir)))
+        # (version, board, daily cube) replaced at once so a request never pairs a version with another board
+        self.snapshot = None
+        self._exports = {}
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._loader = ThreadPoolExecutor(max_workers=1)
+        self._renderer = ThreadPoolExecutor(max_workers=1)
+
+    def _changed_exports(self):
+        """Trello exports of the watched directory that are new or were modified since they were loaded."""
+        changed = []
+        for entry in os.scandir(self.watch_dir):
+            mtime = entry.stat().st_mtime_ns
+            if not entry.name.endswith((".csv", ".json")) or self._exports.get(entry.path) == mtime:
+                continue
+            if entry.name.endswith(".json") or "Card Name" in pd.read_csv(entry.path, nrows=0).columns:
+                changed.append((mtime, entry.path))
+            else:
+                # Other csv files of the directory are only checked again once they change
+                self._exports[entry.path] = mtime
+        return sorted(changed)
+
+    def reload(self):
+        """Upsert the new exports into the ticket store and reload the board from it.
+        :return: True when a new board version was loaded.
+        """
+        changed = self._changed_exports()
+        if not changed:
+            return False
+        for mtime, path in changed:
+            export, export_key, validation, quarantined = load_unstored_export(
+                path,
+                self.ticket_store,
+                earliest_date=self.earliest_date,
+                run_log=RunLog(),
+                output_dir=None,
+                labels_translation=self.labels_translation,
+            )
+            if export is not None:
+                update_ticket_store(export, self.ticket_store, export_key, quarantined, validation)
+            self._exports[path] = mtime
+        trello_board = filter_tickets(read_ticket_store(self.ticket_store))
+        if "TICKET_RESPONSE_TIMESTAMP" in trello_board:
+            trello_board = offset_business_hours(trello_board, self.calendar)
+        trello_board = index_trello_board(trello_board)
+        daily_cube = build_daily_cube(trello_board) if len(trello_board) else None
+        version = self.snapshot[0] + 1 if self.snapshot else 1
+        self.snapshot = (version, trello_board, daily_cube)
+        with self._cache_lock:
+            # Artifacts of the older versions are never requested again
+            self._cache.clear()
+        print_status("Loaded version {} of the board, {} tickets.".format(version, len(trello_board)))
+        return True
+
+    async def watch(self, interval=WATCH_INTERVAL):
+        """Reload the board every interval seconds when the watched directory changed."""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(self._loader, self.reload)
+            except Exception:
+                print_status(
+                    "Could not reload the board:\n{}".format(traceback.format_exc()), "[FAILURE]", "red"
+                )
+            await asyncio.sleep(interval)
+
+    def _cached(self, key):
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        return None
+
+    def _cache_artifact(self, key, artifact):
+        with self._cache_lock:
+            self._cache[key] = artifact
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+
+    def _render(self, version, trello_board, daily_cube, window, report):
+        """Render an artifact of a window and cache it with the other artifacts of the same stage.
+        :return: (content type, body) tuple.
+        """
+        # Another request may have rendered it while this one was queued
+        artifact = self._cached((version, window, report))
+        if artifact is not None:
+            return artifact
+        window_board = process_timestamps(trello_board, *window)
+        if window_board.empty:
+            raise LookupError("no tickets between {} and {}".format(*window))
+        context = ReportContext(window_board, daily_cube)
+
+        if report == "summary":
+            summary = {
+                "start": window[0],
+                "end": window[1],
+                "tickets": len(window_board),
+                "daily_counts": {
+                    day.strftime("%Y-%m-%d"): int(count) for day, count in context.daily_counts.items()
+                },
+            }
+            for field, field_count in context.field_counts.items():
+                summary[field] = {str(value): int(count) for value, count in field_count.items()}
+            if context.sla_summary is not None:
+                summary["SLA_SUMMARY"] = context.sla_summary.to_dict(orient="records")
+            artifact = ("application/json", json.dumps(summary, default=str).encode("utf-8"))
+            self._cache_artifact((version, window, report), artifact)
+            return artifact
+
+        stage = SERVICE_REPORTS[report][0]
+        with tempfile.TemporaryDirectory() as output_dir:
+            REPORT_STAGES[stage](window_board, output_dir, context)
+            CHART_EXPORTER.flush()
+            for report_type, (report_stage, file_name) in SERVICE_REPORTS.items():
+                path = os.path.join(
+                    output_dir,
+                    context.file_name(file_name.format(chart_format=CHART_EXPORTER.chart_format)),
+                )
+                if report_stage != stage or not os.path.exists(path):
+                    continue
+                with open(path, "rb") as f:
+                    body = f.read()
+                content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                self._cache_artifact((version, window, report_type), (content_type, body))
+                if report_type == report:
+                    artifact = (content_type, body)
+        return artifact
+
+    async def artifact(self, start, end, report):
+        """Artifact of a report type for the tickets created in [start, end), from the cache when possible.
+        :return: (content type, body) tuple.
+        """
+        version, trello_board, daily_cube = self.snapshot
+        window = (start.isoformat(), end.isoformat())
+        artifact = self._cached((version, window, report))
+        if artifact is None:
+            artifact = await asyncio.get_running_loop().run_in_executor(
+                self._renderer, self._render, version, trello_board, daily_cube, window, report
+            )
+        return artifact
+
+    async def _respond(self, method, target):
+        """Route a request.
+        :return: (status, content type, body) tuple.
+        """
+        url = urllib.parse.urlsplit(target)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        if method != "GET":
+            return HTTPStatus.METHOD_NOT_ALLOWED, "text/plain", b"Only GET requests are served."
+        if url.path == "/status":
+            status = {
+                "version": self.snapshot[0] if self.snapshot else None,
+                "tickets": len(self.snapshot[1]) if self.snapshot else None,
+                "watched_files": sorted(self._exports),
+                "cached_artifacts": len(self._cache),
+                "reports": ["summary"] + list(SERVICE_REPORTS),
+            }
+            return HTTPStatus.OK, "application/json", json.dumps(status).encode("utf-8")
+        if url.path == "/summary":
+            report = "summary"
+        elif url.path.startswith("/reports/") and url.path[len("/reports/"):] in SERVICE_REPORTS:
+            report = url.path[len("/reports/"):]
+        else:
+            return HTTPStatus.NOT_FOUND, "text/plain", b"Unknown report."
+        if self.snapshot is None:
+            return HTTPStatus.SERVICE_UNAVAILABLE, "text/plain", b"The board is still loading."
+
+        default_start, default_end = calulate_default_start_and_end_dates()
+        try:
+            start = pd.Timestamp(query["start"]) if "start" in query else default_start
+            end = pd.Timestamp(query["end"]) if "end" in query else default_end
+        except ValueError as error:
+            return HTTPStatus.BAD_REQUEST, "text/plain", str(error).encode("utf-8")
+        try:
+            content_type, body = await self.artifact(start, end, report)
+        except LookupError as error:
+            return HTTPStatus.NOT_FOUND, "text/plain", str(error).encode("utf-8")
+        return HTTPStatus.OK, content_type, body
+
+    async def handle(self, reader, writer):
+        """Answer a single HTTP/1.1 request and close the connection."""
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # headers are not used
+            try:
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                status, content_type, body = await self._respond(method, target)
+            except ValueError:
+                status, content_type, body = HTTPStatus.BAD_REQUEST, "text/plain", b"Malformed request."
+            except Exception:
+                print_status(
+                    "Could not answer {!r}:\n{}".format(request_line, traceback.format_exc()),
+                    "[FAILURE]",
+                    "red",
+                )
+                status, content_type, body = HTTPStatus.INTERNAL_SERVER_ERROR, "text/plain", b"Report failed."
+            writer.write(
+                "HTTP/1.1 {} {}\r\nContent-Type: {}\r\nContent-Length: {}\r\nConnection: close\r\n\r\n".format(
+                    status.value, status.phrase, content_type, len(body)
+                ).encode("latin-1")
+                + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+# ------------------------------------------------------------------------------
+async def serve(service, host=SERVICE_HOST, port=SERVICE_PORT, interval=WATCH_INTERVAL):
+    """Serve the reports of a ReportService over HTTP until the process is stopped.
+
+    GET /summary and GET /reports/<report type> take the start and end of the window as query parameters,
+    the default weekly window otherwise. GET /status describes the loaded board.
+    """
+    server = await asyncio.start_server(service.handle, host, port)
+    watcher = asyncio.ensure_future(service.watch(interval))
+    print_status("Serving the reports on http://{}:{}/.".format(host, port))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+
+
+# ------------------------------------------------------------------------------
+def read_holidays(path=None):
+    """Read the holidays excluded from the business hours, one yyyy-mm-dd date per line."""
+    if not path:
+        return []
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+# ------------------------------------------------------------------------------
+def list_boards(pattern, output_dir=OUTPUT_DIR):
+    """List the boards matching a glob, the customer of a board is the name of its file.
+    :return: list of (path, customer, output directory) tuples.
+    """
+    boards = []
+    for path in sorted(glob.glob(pattern)):
+        customer = os.path.splitext(os.path.basename(path))[0]
+        boards.append((path, customer, os.path.join(output_dir, customer)))
+    return boards
+
+
+# ------------------------------------------------------------------------------
+def read_board_manifest(path, output_dir=OUTPUT_DIR):
+    """Read a csv manifest of boards with the BOARD, CUSTOMER and OUTPUT_DIR columns.
+
+    Relative board paths are relative to the manifest, relative output directories to output_dir. The
+    output directory of a customer is named after it when OUTPUT_DIR is missing or empty.
+    :return: list of (path, customer, output directory) tuples.
+    """
+    manifest = pd.read_csv(path, dtype=str)
+    if "OUTPUT_DIR" not in manifest:
+        manifest["OUTPUT_DIR"] = None
+    manifest["OUTPUT_DIR"] = manifest["OUTPUT_DIR"].fillna(manifest["CUSTOMER"])
+    return [
+        (
+            os.path.join(os.path.dirname(path), board),
+            customer,
+            os.path.join(output_dir, customer_output_dir),
+        )
+        for board, customer, customer_output_dir in manifest[
+            ["BOARD", "CUSTOMER", "OUTPUT_DIR"]
+        ].itertuples(index=False, name=None)
     ]
-    customer_report.index.rename("NO.", inplace=True)
-    customer_report = customer_report.sort_values(by=["T#"], ignore_index=True)
-    customer_report.index.rename("NO.", inplace=True)
-    customer_report.index += 1
-    file_name = "EXTERNAL_REPORT.xlsx"
-    report_start_date_abbreviated = (
-        trello_board["TICKET_CREATION_TIMESTAMP"].min().strftime("%d%b%y")
-    ).upper()
-    report_end_date_abbreviated = (
-        trello_board["TICKET_CREATION_TIMESTAMP"].max().strftime("%d%b%y")
-    ).upper()
-    customer_report.to_excel(
-        "./OUTPUT/[{}-{}]{}".format(
-            report_start_date_abbreviated, report_end_date_abbreviated, file_name
-        )
-    )
-    print(colored("[SUCCESS]", "green"), end=".....................")
-    print("External report generated and exported.")
-
-
-def gen_internal_report(trello_board):
-    report_start_date_abbreviated = (
-        trello_board["TICKET_CREATION_TIMESTAMP"].min().strftime("%d%b%y")
-    ).upper()
-    report_end_date_abbreviated = (
-        trello_board["TICKET_CREATION_TIMESTAMP"].max().strftime("%d%b%y")
-    ).upper()
-    trello_board = trello_board.reset_index(drop=True)
-    trello_board.index += 1
-    file_name = "[{}-{}]SOC_REPORT.html".format(
-        report_start_date_abbreviated, report_end_date_abbreviated
-    )
-    trello_board.to_html("./OUTPUT/{}".format(file_name))
-    trello_board.to_excel(
-        "./OUTPUT/[{}-{}]INTERNAL_REPORT.xlsx".format(
-            report_start_date_abbreviated, report_end_date_abbreviated
-        )
-    )
-    html_table_blue_light = build_table(trello_board, "grey_light", index=True)
-    with open("./OUTPUT/{}".format(file_name), "w") as f:
-        f.write(html_table_blue_light)
-    print(colored("[SUCCESS]", "green"), end=".....................")
-    print("Internal report generated and exported.")
+
+
+# ------------------------------------------------------------------------------
+def list_report_windows(start=None, end=None, weekly_since=None):
+    """List the report windows requested on the command line.
+
+    Without any argument, the default weekly window is returned. With weekly_since, every full week from
+    that date until end (or the end of the default window) is returned.
+    :return: list of (start_timestamp, end_timestamp) tuples.
+    """
+    (
+        default_report_start_timestamp,
+        default_report_end_timestamp,
+    ) = calulate_default_start_and_end_dates()
+    end_timestamp = pd.Timestamp(end) if end else default_report_end_timestamp
+    if weekly_since:
+        boundaries = pd.date_range(pd.Timestamp(weekly_since), end_timestamp, freq="7D")
+        return list(zip(boundaries[:-1], boundaries[1:]))
+    start_timestamp = pd.Timestamp(start) if start else default_report_start_timestamp
+    return [(start_timestamp, end_timestamp)]
+
+
+# ------------------------------------------------------------------------------
+def parse_arguments(argv=None):
+    """Parse the command line arguments of the script."""
+    parser = argparse.ArgumentParser(
+        description="Generate security investigation reports and charts from an exported Trello board."
+    )
+    parser.add_argument(
+        "-i", "--input", default=TRELLO_BOARD_PATH, help="exported Trello board csv or json file"
+    )
+    parser.add_argument(
+        "-o", "--output-dir", default=OUTPUT_DIR, help="directory the reports are written to"
+    )
+    parser.add_argument(
+        "--boards",
+        metavar="GLOB",
+        help="report on every board matching GLOB, each in an output subdirectory named after its file",
+    )
+    parser.add_argument(
+        "--manifest",
+        help="csv file of the boards to report on, with the BOARD, CUSTOMER and OUTPUT_DIR columns",
+    )
+    parser.add_argument("--start", help="start of the report window (yyyy-mm-dd hh:mm)")
+    parser.add_argument("--end", help="end of the report window (yyyy-mm-dd hh:mm)")
+    parser.add_argument(
+        "--weekly-since",
+        metavar="DATE",
+        help="generate one report per week from DATE until --end or the default end date",
+    )
+    parser.add_argument(
+        "--interactive",
+        action="store_true",
+        help="ask for the report time range like the previous versions of the script",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1, help="number of report windows generated in parallel"
+    )
+    parser.add_argument(
+        "--only",
+        type=lambda value: value.split(","),
+        help="comma separated report stages to run, out of {}".format(", ".join(REPORT_STAGES)),
+    )
+    parser.add_argument(
+        "--stage-jobs", type=int, help="number of report stages of a window running at the same time"
+    )
+    parser.add_argument(
+        "--stage-pool",
+        choices=["thread", "process"],
+        default="thread",
+        help="run the report stages of a window in threads or in processes",
+    )
+    parser.add_argument(
+        "--chart-format",
+        choices=CHART_FORMATS,
+        default=CHART_FORMAT,
+        help="format of the exported charts, html does not need kaleido",
+    )
+    parser.add_argument(
+        "--html-rows-per-page",
+        type=int,
+        default=HTML_ROWS_PER_PAGE,
+        help="split the html report in pages of that many rows, 0 writes a single page",
+    )
+    parser.add_argument(
+        "--business-hours",
+        default="{}-{}".format(BUSINESS_HOURS_START, BUSINESS_HOURS_END),
+        help="working hours the SLAs are measured in (hh:mm-hh:mm)",
+    )
+    parser.add_argument(
+        "--weekmask",
+        default=BUSINESS_WEEKMASK,
+        help='working days the SLAs are measured in, e.g. "Sun Mon Tue Wed Thu"',
+    )
+    parser.add_argument(
+        "--holidays", help="file with one holiday per line (yyyy-mm-dd) excluded from the SLAs"
+    )
+    parser.add_argument(
+        "--decode-labels",
+        nargs="?",
+        const=LABELS_TRANSLATION_PATH,
+        metavar="TRANSLATION",
+        help="decode the labels of older boards into their columns, translating the codes with the "
+        "TRANSLATION csv file ({} by default)".format(LABELS_TRANSLATION_PATH),
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="upsert the export into the ticket store of its board, named after the input file or the "
+        "customer, and report from the store",
+    )
+    parser.add_argument(
+        "--profile-stage",
+        choices=MEASURED_STAGES,
+        metavar="STAGE",
+        help="profile a single stage into the output directory, out of {}".format(", ".join(MEASURED_STAGES)),
+    )
+    parser.add_argument(
+        "--profiler",
+        choices=PROFILERS,
+        default=PROFILER,
+        help="profile the stage with cProfile (.prof) or with tracemalloc (.tracemalloc.txt)",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="keep the board in memory and serve the reports over HTTP, reloading new exports of --watch-dir",
+    )
+    parser.add_argument("--host", default=SERVICE_HOST, help="address the report service listens on")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT, help="port the report service listens on")
+    parser.add_argument(
+        "--watch-dir", default=INPUT_DIR, help="directory the report service loads the Trello exports from"
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=WATCH_INTERVAL,
+        help="seconds between two checks of --watch-dir for new exports",
+    )
+    parser.add_argument(
+        "--no-validation",
+        action="store_true",
+        help="report on every ticket, without quarantining duplicated, incomplete or inconsistent ones",
+    )
+    parser.add_argument(
+        "--earliest-date",
+        default=EARLIEST_DATE,
+        metavar="DATE",
+        help="quarantine the tickets created or resolved before DATE (yyyy-mm-dd), by default only the "
+        "tickets with timestamps in the future are out of range",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="regenerate every report, even those whose tickets and options did not change",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="do not use the board cache")
+    parser.add_argument(
+        "--invalidate-cache",
+        action="store_true",
+        help="parse the csv file again even if it is cached",
+    )
+    arguments = parser.parse_args(argv)
+    if arguments.weekly_since and arguments.start:
+        parser.error("--weekly-since and --start are mutually exclusive")
+    if arguments.interactive and (
+        arguments.start or arguments.end or arguments.weekly_since
+    ):
+        parser.error("--interactive cannot be combined with a report window")
+    if arguments.serve and (
+        arguments.interactive or arguments.start or arguments.end or arguments.weekly_since
+    ):
+        parser.error("the report windows of --serve are given by the requests")
+    for stage in arguments.only or []:
+        if stage not in REPORT_STAGES:
+            parser.error("unknown report stage {}".format(stage))
+    if arguments.earliest_date:
+        try:
+            pd.Timestamp(arguments.earliest_date)
+        except ValueError:
+            parser.error("--earliest-date {} is not a date (yyyy-mm-dd)".format(arguments.earliest_date))
+    if arguments.boards and arguments.manifest:
+        parser.error("--boards and --manifest are mutually exclusive")
+    if arguments.manifest and not os.path.exists(arguments.manifest):
+        parser.error("the manifest {} does not exist".format(arguments.manifest))
+    if arguments.boards and not glob.glob(arguments.boards):
+        parser.error("no Trello board matches {}".format(arguments.boards))
+    # Fail before the board is loaded, the heavy stages are never imported for a missing export
+    if not (
+        arguments.serve
+        or arguments.interactive
+        or arguments.boards
+        or arguments.manifest
+        or os.path.exists(arguments.input)
+    ):
+        parser.error("the Trello board {} does not exist".format(arguments.input))
+    return arguments
 
 
 if __name__ == "__main__":
+    arguments = parse_arguments()
     about_script()
-    initialisation()
-    start_timestamp, end_timestamp = specify_report_time_range()
-
-    trello_board = load_trello_board()
-    trello_board = filter_tickets(trello_board)
-    trello_board = process_timestamps(trello_board, start_timestamp, end_timestamp)
-    # trello_board = offset_business_hours(trello_board)
-
-    gen_internal_report(trello_board)
-    gen_customer_report(trello_board)
-    gen_summary_table(trello_board)
-    gen_barplot(trello_board)
-    gen_trendline(trello_board)
+    opening, closing = arguments.business_hours.split("-")
+    calendar = BusinessCalendar(
+        opening, closing, arguments.weekmask, read_holidays(arguments.holidays)
+    )
+    if arguments.serve:
+        CHART_EXPORTER.chart_format = arguments.chart_format
+        # Every report is served as a single file
+        HTML_ROWS_PER_PAGE = 0
+        CHART_EXPORTER.warm_up()
+        try:
+            asyncio.run(
+                serve(
+                    ReportService(
+                        arguments.watch_dir,
+                        calendar,
+                        labels_translation=arguments.decode_labels,
+                        earliest_date=arguments.earliest_date,
+                    ),
+                    arguments.host,
+                    arguments.port,
+                    arguments.watch_interval,
+                )
+            )
+        except KeyboardInterrupt:
+            print_status("Stopped the report service.")
+        sys.exit(0)
+
+    if arguments.interactive:
+        initialisation(arguments.input, arguments.output_dir, arguments.force)
+        report_windows = [specify_report_time_range()]
+    else:
+        report_windows = list_report_windows(
+            arguments.start, arguments.end, arguments.weekly_since
+        )
+    if arguments.manifest:
+        boards = read_board_manifest(arguments.manifest, arguments.output_dir)
+    elif arguments.boards:
+        boards = list_boards(arguments.boards, arguments.output_dir)
+    else:
+        boards = [(arguments.input, None, arguments.output_dir)]
+    prepare_output(arguments.output_dir)
+    output_managers = {
+        output_dir: prepare_output(output_dir, arguments.force) for path, customer, output_dir in boards
+    }
+    CHART_EXPORTER.chart_format = arguments.chart_format
+    HTML_ROWS_PER_PAGE = arguments.html_rows_per_page
+    PROFILE_STAGE = arguments.profile_stage
+    PROFILER = arguments.profiler
+    warm_up_charts = arguments.jobs <= 1 and CHART_STAGES & set(arguments.only or REPORT_STAGES)
+    if warm_up_charts and len(boards) == 1:
+        # Kaleido starts up while the board is loading, the processes of report windows start their own
+        CHART_EXPORTER.warm_up()
+
+    try:
+        if len(boards) == 1:
+            trello_boards = [
+                prepare_board(
+                    boards[0][0],
+                    calendar,
+                    use_cache=not arguments.no_cache,
+                    invalidate_cache=arguments.invalidate_cache,
+                    ticket_store=(
+                        ticket_store_path(os.path.splitext(os.path.basename(boards[0][0]))[0])
+                        if arguments.incremental
+                        else None
+                    ),
+                    board=boards[0][1],
+                    output_dir=arguments.output_dir,
+                    labels_translation=arguments.decode_labels,
+                    validate=not arguments.no_validation,
+                    earliest_date=arguments.earliest_date,
+                )
+            ]
+        else:
+            trello_boards = prepare_boards(
+                boards,
+                calendar,
+                use_cache=not arguments.no_cache,
+                invalidate_cache=arguments.invalidate_cache,
+                incremental=arguments.incremental,
+                labels_translation=arguments.decode_labels,
+                validate=not arguments.no_validation,
+                earliest_date=arguments.earliest_date,
+            )
+            if warm_up_charts:
+                # After the board processes are forked, they never render charts
+                CHART_EXPORTER.warm_up()
+
+        customer_boards = {}
+        for (path, customer, output_dir), trello_board in zip(boards, trello_boards):
+            if trello_board is None:
+                continue
+            customer_boards[customer] = trello_board
+            results = gen_report_windows(
+                trello_board,
+                report_windows,
+                output_dir,
+                arguments.jobs,
+                arguments.only,
+                arguments.stage_jobs,
+                arguments.stage_pool,
+                output_managers[output_dir],
+            )
+            for record in results:
+                record["board"] = customer
+            RUN_LOG.records += results
+        if len(boards) > 1 and customer_boards:
+            gen_cross_customer_summary(customer_boards, report_windows, arguments.output_dir)
+    finally:
+        RUN_LOG.print_summary()
+        RUN_LOG.write(os.path.join(arguments.output_dir, RUN_LOG_NAME), vars(arguments))
+    if any(record["error"] for record in RUN_LOG.records):
+        sys.exit(1)